@@ -0,0 +1,139 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+REGIONS = ['South', 'Midwest', 'West', 'Northeast']
+CATEGORIES = ["Men's Fashion", "Women's Fashion", 'Mobiles & Tablets',
+              'Appliances', 'Computing', 'Health & Sports',
+              'Beauty & Grooming', 'Home & Living', 'Kids & Baby',
+              'Superstore', 'Entertainment', 'Books', 'Others']
+STATUSES = ['complete', 'canceled', 'received', 'order_refunded',
+            'refund', 'closed', 'cod']
+STATUS_WEIGHTS = [0.55, 0.2, 0.1, 0.08, 0.03, 0.02, 0.02]
+PAYMENT_METHODS = ['cod', 'Payaxis', 'Easypaisa', 'jazzwallet',
+                   'bankalfalah', 'customercredit', 'Voucher']
+
+START = pd.Timestamp('2016-01-01')
+DAYS = 6 * 365
+ROWS_PER_ORDER = 1.6
+ROWS_PER_CUSTOMER = 8
+# Mean days from signup to an order, before the window cuts it off.
+ACTIVITY_DAYS = 240
+
+
+def parse_size(value: str) -> int:
+    value = value.lower()
+    return SIZES[value] if value in SIZES else int(value)
+
+
+def _customer_attributes(cust_id: np.ndarray):
+    # Deterministic per customer so every chunk agrees on them.
+    signup_day = (cust_id * 7919) % (DAYS - 30)
+    return {
+        'signup': START + pd.to_timedelta(signup_day, unit='D'),
+        'signup_day': signup_day,
+        'age': 18 + (cust_id * 31) % 55,
+        'Gender': np.where(cust_id % 2 == 0, 'M', 'F'),
+        'Region': np.asarray(REGIONS)[cust_id % len(REGIONS)],
+    }
+
+
+def generate_chunk(rng, n_rows: int, n_customers: int, first_order_id: int) -> pd.DataFrame:
+    n_orders = max(int(n_rows / ROWS_PER_ORDER), 1)
+    order_cust = rng.integers(1, n_customers + 1, n_orders)
+    customer = _customer_attributes(order_cust)
+
+    # Activity decays after signup, which gives the cohorts a retention curve.
+    # Offsets are drawn from the exponential truncated to the days left in
+    # the window (as if redrawn until they fit), not clamped onto its end.
+    window = 1 - np.exp(-(DAYS - customer['signup_day']) / ACTIVITY_DAYS)
+    offset = -ACTIVITY_DAYS * np.log1p(-rng.random(n_orders) * window)
+    order_day = customer['signup_day'] + offset.astype(np.int64)
+    order_date = START + pd.to_timedelta(order_day, unit='D')
+
+    row_order = np.sort(rng.integers(0, n_orders, n_rows))
+    cust_id = order_cust[row_order]
+    customer = _customer_attributes(cust_id)
+    signup = customer['signup']
+
+    qty_ordered = rng.integers(1, 5, n_rows)
+    price = rng.lognormal(3.5, 1.0, n_rows).round(2)
+    discount = rng.choice([0.0, 0.0, 0.0, 5.0, 10.0, 25.0], n_rows)
+
+    return pd.DataFrame({
+        'order_id': first_order_id + row_order,
+        'order_date': order_date[row_order].strftime('%d-%m-%Y'),
+        'status': rng.choice(STATUSES, n_rows, p=STATUS_WEIGHTS),
+        'sku': 'SKU' + pd.Series(rng.zipf(1.6, n_rows) % 5000).astype(str),
+        'qty_ordered': qty_ordered,
+        'price': price,
+        'discount_amount': np.minimum(discount, qty_ordered * price),
+        'category': rng.choice(CATEGORIES, n_rows),
+        'payment_method': rng.choice(PAYMENT_METHODS, n_rows),
+        'cust_id': cust_id,
+        'Gender': customer['Gender'],
+        'age': customer['age'],
+        'Customer Since': (signup.month.astype(str) + '/' + signup.day.astype(str) +
+                           '/' + signup.year.astype(str)),
+        'Region': customer['Region'],
+    })
+
+
+def generate(n_rows: int, path: str, seed: int = 0,
+             chunk_rows: int = 1_000_000) -> str:
+    rng = np.random.default_rng(seed)
+    n_customers = max(n_rows // ROWS_PER_CUSTOMER, 1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    written = 0
+    first_order_id = 100_000_000
+    while written < n_rows:
+        rows = min(chunk_rows, n_rows - written)
+        chunk = generate_chunk(rng, rows, n_customers, first_order_id)
+        chunk.to_csv(tmp_path, mode='w' if written == 0 else 'a',
+                     header=written == 0, index=False)
+        first_order_id = int(chunk['order_id'].max()) + 1
+        written += rows
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_path(size: str, data_dir: str) -> str:
+    return os.path.join(data_dir, f"cohort_{size.lower()}.csv")
+
+
+def ensure_dataset(size: str, data_dir: str, seed: int = 0) -> str:
+    path = dataset_path(size, data_dir)
+    if not os.path.exists(path):
+        generate(parse_size(size), path, seed=seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic cohort CSVs in the dashboard's schema.")
+    parser.add_argument('sizes', nargs='+',
+                        help="Row counts, e.g. 10k 100k 1m 10m or a number")
+    parser.add_argument('--data-dir', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        path = dataset_path(size, args.data_dir)
+        generate(parse_size(size), path, seed=args.seed)
+        print(f"{path}: {parse_size(size):,} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate import ensure_dataset, parse_size  # noqa: E402
+from components import Chart  # noqa: E402
+from components.ingest import CACHE_DIR_NAME, derive_features, ingest_csv  # noqa: E402
+from components.parallel import run_batch  # noqa: E402
+from components.tsforecast import CohortModelRunner  # noqa: E402
+
+
+# Cold import of the analytics core in a fresh interpreter; batch jobs and
+# pool workers pay it on every start, so it is held under this budget.
+IMPORT_BUDGET = 1.0
+CORE_MODULE = 'components.core'
+LAYER_MODULES = [CORE_MODULE, 'components.charts', 'components.app']
+# Libraries the core must not pull in.
+CORE_EXCLUDED = ['streamlit', 'plotly', 'statsmodels', 'scipy']
+
+
+def filter_states(chart: Chart) -> dict:
+    min_date = chart.df['order_date'].min()
+    max_date = chart.df['order_date'].max()
+    span = max_date - min_date
+    date_range = ((min_date + span / 4).date(), (max_date - span / 4).date())
+    regions = chart.unique_values('Region')
+    categories = chart.unique_values('category')
+    return {
+        'all': {},
+        'date': {'date_range': date_range},
+        'dims': {
+            'Region': regions[:len(regions) // 2 or 1],
+            'category': categories[:len(categories) // 2 or 1],
+            'status': ['complete'],
+        },
+        'combined': {
+            'date_range': date_range,
+            'Region': regions[:1],
+            'status': ['complete', 'canceled'],
+        },
+    }
+
+
+def measure(fn, repeat: int, memory: bool, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        if before:
+            before()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return min(timings), peak_mb
+
+
+def measure_import(module: str, repeat: int) -> tuple:
+    """Fastest cold import of ``module`` and the top-level packages it loaded."""
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))\n")
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT,
+                                         text=True, stderr=subprocess.DEVNULL)
+        seconds, packages = output.splitlines()[:2]
+        timings.append(float(seconds))
+        loaded = set(packages.split())
+    return min(timings), loaded
+
+
+def bench_imports(repeat: int) -> list:
+    results = []
+    for module in LAYER_MODULES:
+        seconds, _ = measure_import(module, repeat)
+        results.append({'size': 'import', 'rows': None, 'filter': None,
+                        'step': f"import[{module}]", 'seconds': round(seconds, 6),
+                        'peak_mb': None})
+        print(f"{'import':>6} {'-':>9} {results[-1]['step']:<40} {seconds * 1000:10.1f} ms")
+    return results
+
+
+def check_imports(args) -> int:
+    failures = 0
+    for module in LAYER_MODULES:
+        seconds, loaded = measure_import(module, args.repeat)
+        note = ''
+        if module == CORE_MODULE:
+            excluded = sorted(loaded & set(CORE_EXCLUDED))
+            if seconds > args.budget:
+                note += f"  OVER BUDGET ({args.budget * 1000:.0f} ms)"
+                failures += 1
+            if excluded:
+                note += f"  LOADS {', '.join(excluded)}"
+                failures += 1
+        print(f"{module:<24} {seconds * 1000:8.1f} ms{note}")
+    return 1 if failures else 0
+
+
+def chart_methods(prefix: str):
+    return sorted(name for name in dir(Chart)
+                  if name.startswith(prefix) and callable(getattr(Chart, name)))
+
+
+def bench_size(size: str, args) -> list:
+    path = ensure_dataset(size, args.data_dir)
+    n_rows = parse_size(size)
+    results = []
+
+    def record(step, fn, filter_name=None, repeat=args.repeat, before=None):
+        entry = {'size': size, 'rows': n_rows, 'filter': filter_name,
+                 'step': step, 'seconds': None, 'peak_mb': None}
+        try:
+            seconds, peak_mb = measure(fn, repeat, args.memory, before)
+        except Exception as exc:
+            # A failing step is reported, not allowed to end the whole run.
+            entry['error'] = f"{type(exc).__name__}: {exc}"
+            results.append(entry)
+            print(f"{size:>6} {filter_name or '-':>9} {step:<40} "
+                  f"{entry['error'][:60]}")
+            return
+        entry['seconds'] = round(seconds, 6)
+        entry['peak_mb'] = None if peak_mb is None else round(peak_mb, 3)
+        results.append(entry)
+        print(f"{size:>6} {filter_name or '-':>9} {step:<40} "
+              f"{seconds * 1000:10.1f} ms"
+              + ('' if peak_mb is None else f" {peak_mb:10.1f} MB"))
+
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    record('load_data[cold]', lambda: ingest_csv(path), repeat=1,
+           before=lambda: shutil.rmtree(cache_dir, ignore_errors=True))
+    record('load_data[warm]', lambda: ingest_csv(path))
+
+    raw = pd.read_csv(path, low_memory=False)
+    record('init_feat_df', lambda frame=raw: derive_features(frame.copy()), repeat=1)
+    del raw
+
+    chart = Chart(path)
+    # Model fits kept in memory only, so the on-disk store of earlier runs
+    # is not what gets timed.
+    chart.model_runner = CohortModelRunner(cache_dir=None)
+
+    def clear():
+        chart.memo.clear()
+        chart.model_runner.cache.clear()
+
+    for filter_name, filters in filter_states(chart).items():
+        state = {'date_range': None, 'Region': None,
+                 'category': None, 'status': None, **filters}
+
+        def apply():
+            chart.filters.update(state)
+            chart.apply_filters()
+            return chart.filtered_df
+
+        record('apply_filters', apply, filter_name)
+        apply()
+
+        for name in ['compute_kpis'] + chart_methods('calculate_') + \
+                chart_methods('plot_'):
+            # Start every call from an empty memo so shared tables count
+            # against the first caller that needs them.
+            record(name, getattr(chart, name), filter_name, before=clear)
+        # Every chart at once on the worker pool, as a dashboard rerun does.
+        record('plot_*[batch]', lambda: run_batch(chart, chart_methods('plot_')),
+               filter_name, before=clear)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = bench_imports(args.repeat)
+    for size in args.sizes:
+        results.extend(bench_size(size, args))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+
+def compare(args):
+    def load(path):
+        with open(path) as f:
+            report = json.load(f)
+        return {(r['size'], r['filter'], r['step']): r for r in report['results']}
+
+    old, new = load(args.baseline), load(args.candidate)
+    regressions = 0
+    for key in sorted(set(old) & set(new), key=lambda k: tuple(map(str, k))):
+        before, after = old[key]['seconds'], new[key]['seconds']
+        if before is None or after is None:
+            continue
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > args.threshold and after - before > args.min_delta:
+            flag = '  REGRESSION'
+            regressions += 1
+        size, filter_name, step = key
+        print(f"{size:>6} {filter_name or '-':>9} {step:<40} "
+              f"{before * 1000:10.1f} -> {after * 1000:10.1f} ms "
+              f"({ratio:5.2f}x){flag}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main():
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    parser = argparse.ArgumentParser(
+        description="Time the Data/Chart pipeline on synthetic datasets.")
+    sub = parser.add_subparsers(dest='command')
+
+    run_parser = sub.add_parser('run', help="Run the benchmarks")
+    run_parser.add_argument('sizes', nargs='*', default=['10k', '100k'],
+                            help="Dataset sizes: 10k 100k 1m 10m")
+    run_parser.add_argument('--data-dir', default=os.path.join('benchmarks', 'data'))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--no-memory', dest='memory', action='store_false',
+                            help="Skip the tracemalloc peak-memory pass")
+    run_parser.add_argument('--out', default=os.path.join(
+        'benchmarks', 'results', f"{datetime.now():%Y%m%d-%H%M%S}.json"))
+
+    compare_parser = sub.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=1.2)
+    compare_parser.add_argument('--min-delta', type=float, default=0.005,
+                                help="Ignore slowdowns smaller than this (seconds)")
+    compare_parser.add_argument('--fail-on-regression', action='store_true')
+
+    imports_parser = sub.add_parser(
+        'imports', help="Check cold import time of the core against its budget")
+    imports_parser.add_argument('--repeat', type=int, default=5)
+    imports_parser.add_argument('--budget', type=float, default=IMPORT_BUDGET,
+                                help="Seconds allowed for a cold core import")
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ('run', 'compare', 'imports', '-h', '--help'):
+        argv = ['run'] + argv
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        sys.exit(compare(args))
+    if args.command == 'imports':
+        sys.exit(check_imports(args))
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
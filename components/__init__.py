@@ -1,3 +1,19 @@
-from .data import Data, Chart
+import importlib
 
-__all__ = ['Data', 'Chart']
+# Resolved on first access: importing the pandas-only core (e.g. for the
+# export CLI or a pool worker) loads neither Plotly (charts) nor
+# Streamlit (app).
+_EXPORTS = {
+    'Data': 'core',
+    'Chart': 'charts',
+    'session_chart': 'app',
+    'Dataset': 'dataset',
+}
+
+__all__ = ['Data', 'Chart', 'Dataset', 'session_chart']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,43 @@
+import pandas as pd
+import streamlit as st
+
+from .charts import Chart
+from .core import open_dataset
+from .dataset import Dataset
+from .ingest import cache_key
+from .stream import should_stream
+
+
+# One prepared dataset per source version, shared by all reruns and sessions.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_dataset(csv_file: str, version: str, streaming: bool) -> Dataset:
+    return open_dataset(csv_file, streaming)
+
+
+def load_dataset(csv_file: str, streaming: bool = None) -> Dataset:
+    # Sources too large to hold as rows are streamed into aggregates.
+    if streaming is None:
+        streaming = should_stream(csv_file)
+    return _load_dataset(csv_file, cache_key(csv_file), streaming)
+
+
+def load_data(csv_file: str) -> pd.DataFrame:
+    return load_dataset(csv_file).df
+
+
+def theme_base() -> str:
+    return st.get_option("theme.base") or "light"
+
+
+def session_chart(csv_file: str, key: str = 'chart', **kwargs) -> Chart:
+    # One Chart per browser session, kept across reruns so its memo and
+    # filter state survive; rebuilt only when the shared dataset changes.
+    dataset = load_dataset(csv_file, kwargs.get('streaming'))
+    chart = st.session_state.get(key)
+    if chart is None or chart.dataset is not dataset:
+        chart = st.session_state[key] = Chart(csv_file, dataset=dataset, **kwargs)
+    else:
+        chart.profiler.start_run()
+    # Read once per rerun instead of by every chart.
+    chart.theme_base = theme_base()
+    return chart
@@ -0,0 +1,776 @@
+import json
+
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure
+from plotly.subplots import make_subplots
+
+from .core import Data
+from .dataset import Dataset
+from .downsample import MAX_SCATTER_POINTS, stratified_sample
+from .figcache import FigureCache, figure_cache
+from .cube import month_labels
+from .profiling import profiled
+from .rfm import RFMEngine
+
+
+PRIMARY_COLOR = "#2596be"
+CHURNED_COLOR = "#FF6B6B"
+STAYED_COLOR = "#51CF66"
+JOINED_COLOR = "#4DABF7"
+
+
+class FigureSpec(BaseFigure):
+    """A figure's serialized spec, handed to renderers as-is.
+
+    ``st.plotly_chart`` and ``plotly.io`` take a ``BaseFigure``'s own
+    ``to_dict()`` without validating it again, so a figure cache hit
+    builds no graph objects. ``figure()`` gives a real ``go.Figure``.
+    """
+
+    def __init__(self, payload: str):
+        # BaseFigure.__init__ would validate and build the whole tree.
+        self._payload = payload
+
+    def to_dict(self) -> dict:
+        return json.loads(self._payload)
+
+    to_plotly_json = to_dict
+
+    def to_json(self, *args, **kwargs) -> str:
+        return self._payload
+
+    def figure(self) -> go.Figure:
+        return pio.from_json(self._payload)
+
+    def __eq__(self, other):
+        return isinstance(other, FigureSpec) and other._payload == self._payload
+
+    __hash__ = None
+
+
+def get_title_style(theme_base: str = "light"):
+    return {
+        'font': {
+            'size': 22,
+            'color': 'white' if theme_base != "dark" else "#2d3748"
+        }
+    }
+
+
+class Chart(Data):
+    def __init__(self, csv_file: str, theme: str = "plotly",
+                 rfm_engine: RFMEngine = None, streaming: bool = None,
+                 figure_cache: FigureCache = figure_cache, dataset: Dataset = None):
+        super().__init__(csv_file, streaming, rfm_engine, dataset)
+        self.theme = theme
+        # The UI's base theme ("light"/"dark"), set by the app once per
+        # rerun; titles are styled from it without asking Streamlit.
+        self.theme_base = "light"
+        self.max_scatter_points = MAX_SCATTER_POINTS
+        self.figure_cache = figure_cache
+
+    def figure_key(self, name: str):
+        # Everything a plot_* result depends on besides the method itself.
+        # Row-level and streamed datasets of one source share a version.
+        return (type(self.dataset).__name__, self.dataset.version, self.filter_state,
+                name, self.theme, repr(get_title_style(self.theme_base)), self.approximate,
+                self.sketch_precision, self.max_scatter_points, self.rfm_engine.cache_key())
+
+    def figure(self, name: str):
+        """``plot_<name>`` via the figure cache shared across sessions.
+
+        A ``FigureSpec`` of the cached JSON when the cache is used, the
+        ``go.Figure`` itself otherwise.
+        """
+        render = getattr(self, name)
+        if self.figure_cache is None or self.dataset.version is None:
+            return render()
+
+        misses = self.figure_cache.misses
+        with self.profiler.track(f"figure[{name}]", rows_in=self.selected_rows()) as record:
+            payload = self.figure_cache.get_or_render(
+                self.figure_key(name), lambda: render().to_json())
+            record['cache_hit'] = self.figure_cache.misses == misses
+            return FigureSpec(payload)
+
+    @profiled
+    def plot_cohort_retention_heatmap(self):
+        matrix = self.calculate_cohort_matrix()
+        retention = matrix.retention()
+
+        # Top 20 cohorts by size, without ages none of them reached
+        top_cohorts = matrix.top_cohorts(20)
+        cohort_pivot = retention[retention.index.isin(top_cohorts)]
+        cohort_pivot = cohort_pivot.dropna(axis=1, how='all')
+
+        max_age = min(24, cohort_pivot.columns.max())
+        cohort_pivot = cohort_pivot.loc[:, cohort_pivot.columns <= max_age]
+        cohort_pivot = cohort_pivot.sort_index(ascending=False)
+
+        text_display = cohort_pivot.round(1).astype(str) + '%'
+        text_display = text_display.replace('nan%', '')
+
+        fig = px.imshow(
+            cohort_pivot,
+            labels=dict(x="Cohort Age (Months)",
+                        y="Cohort Month", color="Retention %"),
+            x=cohort_pivot.columns.tolist(),
+            y=[str(idx) for idx in cohort_pivot.index],
+            color_continuous_scale='Teal',
+            aspect='auto',
+            text_auto=False
+        )
+
+        fig.update_traces(
+            text=text_display.values,
+            texttemplate='%{text}',
+            textfont={"size": 9}
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Customer Retention by Cohort Month (Top 20 Cohorts)",
+                **title_style
+            },
+            xaxis_title="Cohort Age (Months)",
+            yaxis_title="Cohort Month",
+            height=500,
+            coloraxis_colorbar=dict(title="Retention %")
+        )
+
+        return fig
+
+    @profiled
+    def plot_cohort_size_distribution(self):
+        cohort_sizes = self.distinct_count(
+            'cust_id', by='cohort_month').reset_index()
+        cohort_sizes.columns = ['cohort_month', 'customers']
+        cohort_sizes['cohort_month'] = month_labels(
+            cohort_sizes['cohort_month'], '%Y-%m')
+
+        fig = px.bar(
+            cohort_sizes.sort_values('customers', ascending=True),
+            x='customers',
+            y='cohort_month',
+            orientation='h',
+            color='customers',
+            color_continuous_scale='Teal',
+            text='customers'
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Acquisition Cohort Sizes",
+                **title_style
+            },
+            xaxis_title="Number of Customers",
+            yaxis_title="Cohort Month",
+            height=500,
+            showlegend=False
+        )
+        fig.update_traces(textposition='outside')
+
+        return fig
+
+    @profiled
+    def plot_average_retention_curve(self):
+        df_cohort = self.calculate_cohort_data()
+
+        avg_retention = df_cohort.groupby('cohort_age')['retention_rate'].agg([
+            'mean', 'std']).reset_index()
+
+        fig = go.Figure()
+
+        # Main line
+        fig.add_trace(go.Scatter(
+            x=avg_retention['cohort_age'],
+            y=avg_retention['mean'],
+            mode='lines+markers',
+            name='Average Retention',
+            line=dict(color=PRIMARY_COLOR, width=3),
+            marker=dict(size=8)
+        ))
+
+        # Confidence interval
+        fig.add_trace(go.Scatter(
+            x=avg_retention['cohort_age'],
+            y=avg_retention['mean'] + avg_retention['std'],
+            mode='lines',
+            name='Upper Bound',
+            line=dict(width=0),
+            showlegend=False
+        ))
+
+        fig.add_trace(go.Scatter(
+            x=avg_retention['cohort_age'],
+            y=avg_retention['mean'] - avg_retention['std'],
+            mode='lines',
+            name='Lower Bound',
+            line=dict(width=0),
+            fillcolor='rgba(13, 148, 136, 0.2)',
+            fill='tonexty',
+            showlegend=False
+        ))
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Average Retention Rate Over Time",
+                **title_style
+            },
+            xaxis_title="Cohort Age (Months)",
+            yaxis_title="Retention Rate (%)",
+            height=400,
+            hovermode='x unified'
+        )
+
+        return fig
+
+    @profiled
+    def plot_revenue_trend(self):
+        monthly_revenue = self.calculate_cube().groupby(
+            'month')['revenue'].sum().sort_index().reset_index()
+        monthly_revenue['order_month_name'] = month_labels(
+            monthly_revenue['month'])
+        monthly_revenue['cumulative_revenue'] = monthly_revenue['revenue'].cumsum()
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Scatter(
+            x=monthly_revenue['order_month_name'],
+            y=monthly_revenue['revenue'],
+            name='Monthly Revenue',
+            fill='tozeroy',
+            line=dict(color=PRIMARY_COLOR, width=2)
+        ))
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Monthly Revenue Trend",
+                **title_style
+            },
+            xaxis_title="Month",
+            yaxis_title="Revenue ($)",
+            height=400,
+            hovermode='x unified'
+        )
+
+        return fig
+
+    @profiled
+    def plot_revenue_by_category(self):
+        category_revenue = self.calculate_cube().groupby(
+            'category', observed=True)['revenue'].sum().reset_index()
+        category_revenue = category_revenue.sort_values(
+            'revenue', ascending=False)
+
+        fig = px.treemap(
+            category_revenue,
+            path=['category'],
+            values='revenue',
+            color='revenue',
+            color_continuous_scale='Teal',
+            title="Revenue Distribution by Category"
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Revenue Distribution by Category",
+                **title_style
+            },
+            height=450
+        )
+
+        return fig
+
+    @profiled
+    def plot_top_products(self):
+        product_revenue = self.group_totals(['sku', 'category'])
+        product_revenue = product_revenue.sort_values(
+            'revenue', ascending=False).head(10)
+
+        fig = px.bar(
+            product_revenue.sort_values('revenue', ascending=True),
+            x='revenue',
+            y='sku',
+            orientation='h',
+            color='category',
+            text='revenue',
+            color_discrete_sequence=px.colors.sequential.Teal
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Top 10 Products by Revenue",
+                **title_style
+            },
+            xaxis_title="Revenue ($)",
+            yaxis_title="Product SKU",
+            height=500
+        )
+        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+
+        return fig
+
+    @profiled
+    def plot_revenue_by_payment(self):
+        payment_revenue = self.calculate_cube().groupby(
+            'payment_method', observed=True)['revenue'].sum().reset_index()
+        payment_revenue = payment_revenue.sort_values(
+            'revenue', ascending=False)
+
+        fig = px.pie(
+            payment_revenue,
+            values='revenue',
+            names='payment_method',
+            hole=0.4,
+            color_discrete_sequence=px.colors.sequential.Teal
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Revenue Distribution by Payment Method",
+                **title_style
+            },
+            height=400
+        )
+        fig.update_traces(textposition='inside', textinfo='percent+label')
+
+        return fig
+
+    @profiled
+    def plot_rfm_segmentation(self):
+        rfm = self.calculate_rfm()
+        # Marker sizes must be non-negative; refunds and float rounding can
+        # push monetary just below 0.
+        rfm = rfm.assign(monetary=rfm['monetary'].clip(lower=0))
+
+        # One marker per customer does not scale; large selections are
+        # drawn from a per-segment sample that keeps the extremes.
+        title = "RFM Customer Segmentation"
+        if len(rfm) > self.max_scatter_points:
+            sample = stratified_sample(
+                rfm['segment'], [rfm['recency'], rfm['frequency'], rfm['monetary']],
+                self.max_scatter_points)
+            title += f" (sample of {len(sample):,} / {len(rfm):,} customers)"
+            rfm = rfm.iloc[sample]
+
+        fig = px.scatter(
+            rfm,
+            x='recency',
+            y='frequency',
+            size='monetary',
+            color='segment',
+            hover_data=['cust_id'],
+            color_discrete_map={
+                'High Value': PRIMARY_COLOR,
+                'At Risk': '#FF6B35',
+                'New': '#0068C9',
+                'Low Value': '#8B5CF6'
+            }
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': title,
+                **title_style
+            },
+            xaxis_title="Recency (Days Since Last Purchase)",
+            yaxis_title="Frequency (Number of Orders)",
+            height=500
+        )
+
+        return fig
+
+    @profiled
+    def plot_purchase_frequency(self):
+        customer_orders = pd.DataFrame(
+            {'order_count': self.calculate_customer_summary().order_count})
+
+        fig = px.histogram(
+            customer_orders,
+            x='order_count',
+            nbins=20,
+            color_discrete_sequence=[PRIMARY_COLOR]
+        )
+
+        # Add mean line
+        mean_orders = customer_orders['order_count'].mean()
+        fig.add_vline(x=mean_orders, line_dash="dash", line_color="red",
+                      annotation_text=f"Mean: {mean_orders:.1f}")
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Distribution of Purchase Frequency",
+                **title_style
+            },
+            xaxis_title="Number of Orders per Customer",
+            yaxis_title="Number of Customers",
+            height=400
+        )
+
+        return fig
+
+    @profiled
+    def plot_clv_distribution(self):
+        # RFM rows are aligned with the customer summary, so its monetary
+        # column is already each customer's lifetime revenue.
+        rfm = self.calculate_rfm()
+        customer_clv = pd.DataFrame({
+            'cust_id': rfm['cust_id'],
+            'clv': rfm['monetary'],
+            'segment': rfm['segment']
+        })
+
+        fig = px.box(
+            customer_clv,
+            x='segment',
+            y='clv',
+            color='segment',
+            color_discrete_map={
+                'High Value': PRIMARY_COLOR,
+                'At Risk': '#FF6B35',
+                'New': '#0068C9',
+                'Low Value': '#8B5CF6'
+            }
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Customer Lifetime Value Distribution by Segment",
+                **title_style
+            },
+            xaxis_title="Customer Segment",
+            yaxis_title="CLV ($)",
+            height=450,
+            showlegend=False
+        )
+
+        return fig
+
+    @profiled
+    def plot_time_between_purchases(self):
+        time_diffs = self.purchase_intervals()
+
+        if len(time_diffs) > 0:
+            fig = px.histogram(
+                x=time_diffs,
+                nbins=30,
+                color_discrete_sequence=[PRIMARY_COLOR]
+            )
+
+            median_days = np.median(time_diffs)
+            mean_days = np.mean(time_diffs)
+
+            fig.add_vline(x=median_days, line_dash="dash", line_color="blue",
+                          annotation_text=f"Median: {median_days:.0f} days")
+            fig.add_vline(x=mean_days, line_dash="dash", line_color="red",
+                          annotation_text=f"Mean: {mean_days:.0f} days")
+
+            title_style = get_title_style(self.theme_base)
+            fig.update_layout(
+                title={
+                    'text': "Average Time Between Purchases",
+                    **title_style
+                },
+                xaxis_title="Days Between Consecutive Purchases",
+                yaxis_title="Frequency",
+                height=400
+            )
+        else:
+            fig = go.Figure()
+            title_style = get_title_style(self.theme_base)
+            fig.update_layout(
+                title={
+                    'text': "Purchase intervals need row-level data"
+                    if self.streaming else "No repeat purchase data available",
+                    **title_style
+                }
+            )
+
+        return fig
+
+    @profiled
+    def plot_revenue_by_region(self):
+        regional_revenue = self.calculate_cube().groupby(
+            'Region', observed=True)['revenue'].sum().reset_index()
+        regional_revenue = regional_revenue.sort_values(
+            'revenue', ascending=False)
+
+        fig = px.bar(
+            regional_revenue,
+            x='Region',
+            y='revenue',
+            color='revenue',
+            color_continuous_scale='Teal',
+            text='revenue'
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Regional Revenue Distribution",
+                **title_style
+            },
+            xaxis_title="Region",
+            yaxis_title="Revenue ($)",
+            height=400,
+            showlegend=False
+        )
+        fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+
+        return fig
+
+    @profiled
+    def plot_age_distribution(self):
+        # Get unique customers with their age
+        summary = self.calculate_customer_summary()
+        customer_age = pd.DataFrame({
+            'age': summary.age,
+            'Gender': summary.gender
+        })
+
+        fig = px.histogram(
+            customer_age,
+            x='age',
+            color='Gender',
+            nbins=15,
+            barmode='overlay',
+            color_discrete_sequence=[PRIMARY_COLOR, '#FF6B35']
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Customer Age Distribution by Gender",
+                **title_style
+            },
+            xaxis_title="Age",
+            yaxis_title="Number of Customers",
+            height=400
+        )
+
+        return fig
+
+    @profiled
+    def plot_regional_performance_matrix(self):
+        regional_metrics = pd.concat([
+            self.distinct_count('cust_id', by='Region'),
+            self.calculate_cube().groupby(
+                'Region', observed=True)['revenue'].sum(),
+            self.distinct_count('order_id', by='Region')
+        ], axis=1)
+        regional_metrics.index.name = 'Region'
+        regional_metrics = regional_metrics.reset_index()
+
+        regional_metrics['aov'] = regional_metrics['revenue'] / \
+            regional_metrics['order_id']
+
+        fig = px.scatter(
+            regional_metrics,
+            x='cust_id',
+            y='aov',
+            size='revenue',
+            color='Region',
+            text='Region',
+            color_discrete_sequence=px.colors.sequential.Teal
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Regional Performance: Customers vs AOV",
+                **title_style
+            },
+            xaxis_title="Number of Customers",
+            yaxis_title="Average Order Value ($)",
+            height=450
+        )
+        fig.update_traces(textposition='top center')
+
+        return fig
+
+    @profiled
+    def plot_category_by_region(self):
+        regional_category = self.calculate_cube().groupby(
+            ['Region', 'category'], observed=True)['revenue'].sum().reset_index()
+
+        fig = px.bar(
+            regional_category,
+            x='Region',
+            y='revenue',
+            color='category',
+            barmode='stack',
+            color_discrete_sequence=px.colors.sequential.Teal
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Product Category Preferences by Region",
+                **title_style
+            },
+            xaxis_title="Region",
+            yaxis_title="Revenue ($)",
+            height=500
+        )
+
+        return fig
+
+    @profiled
+    def plot_order_status_funnel(self):
+        # Define funnel stages
+        status_counts = self.distinct_count(
+            'order_id', by='status').reset_index()
+        status_counts.columns = ['status', 'count']
+        status_counts['status'] = status_counts['status'].astype(str)
+
+        # Order for funnel
+        funnel_order = ['received', 'complete',
+                        'canceled', 'order_refunded', 'refund', 'cod']
+        status_counts['order'] = status_counts['status'].apply(
+            lambda x: funnel_order.index(x) if x in funnel_order else 999
+        )
+        status_counts = status_counts.sort_values('order')
+
+        fig = go.Figure(go.Funnel(
+            y=status_counts['status'],
+            x=status_counts['count'],
+            textinfo="value+percent initial",
+            marker={"color": [PRIMARY_COLOR, "#0ea5a5",
+                              "#FF6B35", "#EF4444", "#8B5CF6", "#0068C9"]}
+        ))
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Order Processing Funnel",
+                **title_style
+            },
+            height=450
+        )
+
+        return fig
+
+    @profiled
+    def plot_order_status_trend(self):
+        status_trend = self.calculate_cube().groupby(
+            ['month', 'status'], observed=True)['rows'].sum().reset_index(name='count')
+        status_trend = status_trend.sort_values(['month', 'status'])
+        status_trend['order_month_name'] = month_labels(status_trend['month'])
+
+        fig = px.area(
+            status_trend,
+            x='order_month_name',
+            y='count',
+            color='status',
+            color_discrete_sequence=px.colors.sequential.Teal
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Order Status Trends Over Time",
+                **title_style
+            },
+            xaxis_title="Month",
+            yaxis_title="Number of Orders",
+            height=450
+        )
+
+        return fig
+
+    @profiled
+    def plot_cancellation_analysis(self):
+        # Calculate rates by category
+        cube = self.calculate_cube()
+        category_status = cube.groupby(
+            ['category', 'status'], observed=True)['rows'].sum().reset_index(name='count')
+        total_by_category = cube.groupby(
+            'category', observed=True)['rows'].sum().reset_index(name='total')
+
+        category_status = category_status.merge(
+            total_by_category, on='category')
+        category_status['rate'] = (
+            category_status['count'] / category_status['total']) * 100
+
+        # Filter for cancelled and refunded
+        problem_status = category_status[category_status['status'].isin(
+            ['canceled', 'order_refunded'])]
+
+        fig = px.bar(
+            problem_status,
+            x='category',
+            y='rate',
+            color='status',
+            barmode='group',
+            color_discrete_map={
+                'canceled': '#EF4444',
+                'order_refunded': '#FF6B35'
+            }
+        )
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Cancellation and Refund Rates by Category",
+                **title_style
+            },
+            xaxis_title="Category",
+            yaxis_title="Rate (%)",
+            height=450,
+            xaxis={'tickangle': 45}
+        )
+
+        return fig
+
+    @profiled
+    def plot_order_heatmap(self):
+        # Create heatmap data
+        heatmap_data = self.group_totals(['day_of_week', 'hour']).rename(
+            columns={'rows': 'orders'})
+        heatmap_pivot = heatmap_data.pivot(
+            index='day_of_week', columns='hour', values='orders').fillna(0)
+
+        # Order days
+        days_order = ['Monday', 'Tuesday', 'Wednesday',
+                      'Thursday', 'Friday', 'Saturday', 'Sunday']
+        heatmap_pivot = heatmap_pivot.reindex(range(len(days_order)))
+        heatmap_pivot.index = days_order
+
+        fig = go.Figure(data=go.Heatmap(
+            z=heatmap_pivot.values,
+            x=heatmap_pivot.columns,
+            y=heatmap_pivot.index,
+            colorscale='Teal',
+            text=heatmap_pivot.values,
+            texttemplate='%{text}',
+            textfont={"size": 10},
+            colorbar=dict(title="Orders")
+        ))
+
+        title_style = get_title_style(self.theme_base)
+        fig.update_layout(
+            title={
+                'text': "Order Volume Heatmap: Day & Time Analysis",
+                **title_style
+            },
+            xaxis_title="Hour of Day",
+            yaxis_title="Day of Week",
+            height=450
+        )
+
+        return fig
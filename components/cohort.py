@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from .summary import CustomerSummary
+
+
+def month_ordinals(dates: np.ndarray) -> np.ndarray:
+    # Months since 1970-01, the same ordinal pandas uses for Period('M').
+    return dates.astype('datetime64[M]').astype(np.int64)
+
+
+class CohortMatrix:
+    """Dense (cohort x cohort age) matrices built from integer codes.
+
+    Each customer's cohort is the month of their first order in the
+    selection and each row's age is its order month minus that cohort, so
+    every view is a bincount over ``cohort * n_ages + age`` with no merges.
+    Even decades of monthly cohorts stay a few hundred rows by columns.
+    """
+
+    def __init__(self, summary: CustomerSummary, df: pd.DataFrame):
+        self._build(summary, summary.row_codes,
+                    month_ordinals(df['order_date'].to_numpy()),
+                    df['revenue'].to_numpy())
+
+    @classmethod
+    def from_activity(cls, summary: CustomerSummary, codes, months, revenue):
+        """Matrix from (customer code, order month, revenue) records.
+
+        Records may already be summed per customer and month, as a
+        streamed ingest produces them; duplicates are allowed.
+        """
+        matrix = cls.__new__(cls)
+        matrix._build(summary, codes, months, revenue)
+        return matrix
+
+    def _build(self, summary: CustomerSummary, codes, row_month, revenue):
+        first_month = month_ordinals(summary.first_order)
+
+        if len(first_month):
+            self.first_cohort = int(first_month.min())
+            n_cohorts = int(first_month.max()) - self.first_cohort + 1
+            n_ages = int(row_month.max()) - self.first_cohort + 1
+        else:
+            self.first_cohort, n_cohorts, n_ages = 0, 0, 0
+        self.shape = (n_cohorts, n_ages)
+
+        customer_cohort = first_month - self.first_cohort
+        row_cohort = customer_cohort[codes]
+        row_age = row_month - first_month[codes]
+        cells = row_cohort * n_ages + row_age
+        size = n_cohorts * n_ages
+
+        # Distinct active customers: one count per (customer, order month).
+        pairs = np.unique(codes.astype(np.int64) * max(n_ages, 1) +
+                          (row_month - self.first_cohort))
+        pair_cust = pairs // max(n_ages, 1)
+        pair_age = pairs % max(n_ages, 1) + self.first_cohort - first_month[pair_cust]
+        self.active = np.bincount(customer_cohort[pair_cust] * n_ages + pair_age,
+                                  minlength=size).reshape(self.shape)
+
+        self.revenue = np.bincount(cells, weights=revenue,
+                                   minlength=size).reshape(self.shape)
+        self.cohort_size = self.active[:, 0] if n_ages else np.zeros(0, np.int64)
+
+    @property
+    def cohorts(self) -> pd.PeriodIndex:
+        return pd.PeriodIndex.from_ordinals(
+            self.first_cohort + np.arange(self.shape[0]), freq='M')
+
+    def top_cohorts(self, n: int) -> pd.PeriodIndex:
+        sizes = pd.Series(self.cohort_size, index=self.cohorts)
+        return sizes[sizes > 0].nlargest(n).index
+
+    def _frame(self, values, mask_empty=True) -> pd.DataFrame:
+        values = values.astype(float)
+        if mask_empty:
+            values[self.active == 0] = np.nan
+        frame = pd.DataFrame(values, index=self.cohorts,
+                             columns=np.arange(self.shape[1]))
+        frame.index.name = 'cohort_month'
+        frame.columns.name = 'cohort_age'
+        return frame[self.cohort_size > 0]
+
+    def retention(self) -> pd.DataFrame:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = self.active / self.cohort_size[:, None] * 100
+        return self._frame(rates)
+
+    def revenue_per_cohort(self) -> pd.DataFrame:
+        return self._frame(self.revenue, mask_empty=False)
+
+    def cumulative_ltv(self) -> pd.DataFrame:
+        # Revenue to date per acquired customer; ages beyond the last
+        # observed month of each cohort stay empty.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ltv = np.cumsum(self.revenue, axis=1) / self.cohort_size[:, None]
+        observed = np.arange(self.shape[1]) <= (
+            self.shape[1] - 1 - np.arange(self.shape[0]))[:, None]
+        ltv[~observed] = np.nan
+        return self._frame(ltv, mask_empty=False)
+
+    def to_long(self) -> pd.DataFrame:
+        cohort, age = np.nonzero(self.active)
+        ordinals = self.first_cohort + cohort
+        return pd.DataFrame({
+            'cohort_month': pd.PeriodIndex.from_ordinals(ordinals, freq='M'),
+            'order_month': pd.PeriodIndex.from_ordinals(ordinals + age, freq='M'),
+            'active_customers': self.active[cohort, age],
+            'cohort_age': age,
+            'cohort_size': self.cohort_size[cohort],
+            'retention_rate': self.active[cohort, age] / self.cohort_size[cohort] * 100,
+            'revenue': self.revenue[cohort, age]
+        })
@@ -0,0 +1,329 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .cohort import CohortMatrix
+from .cube import aggregate_cells
+from .dataset import AggregateDataset, Dataset
+from .forecast import RetentionForecast
+from .ingest import derive_features
+from .memo import MemoCache, filter_key, memoized
+from .profiling import Profiler, profiled
+from .rfm import RFMEngine
+from .sketch import DEFAULT_PRECISION
+from .stream import aggregate_groups, should_stream
+from .summary import CustomerSummary
+from .tsforecast import CohortModelRunner, model_cache_dir
+
+
+def open_dataset(csv_file: str, streaming: bool = None) -> Dataset:
+    # Sources too large to hold as rows are streamed into aggregates; the
+    # load is profiled into the dataset's load_records.
+    profiler = Profiler()
+    with profiler.track('open_dataset') as record:
+        if streaming is None:
+            streaming = should_stream(csv_file)
+        record['streaming'] = streaming
+        cls = AggregateDataset if streaming else Dataset
+        dataset = cls.from_csv(csv_file, profiler=profiler)
+        record['rows_out'] = len(dataset)
+    return dataset
+
+
+class Data:
+    """Filtering, KPIs and derived tables over one prepared dataset.
+
+    Pure pandas/NumPy: batch jobs and pool workers use it directly.
+    ``charts.Chart`` adds the Plotly figures and ``app`` the Streamlit
+    caching and session state.
+    """
+
+    def __init__(self, csv_file, streaming: bool = None, rfm_engine: RFMEngine = None,
+                 dataset: Dataset = None):
+        self.profiler = Profiler()
+        with self.profiler.track('load_data') as record:
+            # An already loaded dataset (e.g. the app's shared one) is reused;
+            # its load is listed here either way, flagged when shared.
+            record['shared'] = dataset is not None
+            self.dataset = dataset if dataset is not None else \
+                self.load_dataset(csv_file, streaming)
+            self.profiler.replay(self.dataset.load_records, shared=record['shared'])
+            record['rows_out'] = len(self.dataset)
+        self.streaming = isinstance(self.dataset, AggregateDataset)
+        # A shallow copy-on-write view: the column data is the shared base
+        # table, but nothing a session assigns can reach other sessions.
+        self.df = None if self.streaming else self.dataset.df.copy(deep=False)
+        self.init_feat_df()
+
+        self.filters = {
+            "date_range": None,
+            'Region': None,
+            'category': None,
+            'status': None
+        }
+        self.rows = slice(0, len(self.dataset))
+        self._filtered_df = self.df
+        self._lock = threading.Lock()
+        self.filter_state = filter_key(self.filters)
+        self.memo = MemoCache()
+        self.approximate = False
+        self.sketch_precision = DEFAULT_PRECISION
+        self.rfm_engine = rfm_engine or RFMEngine()
+        # Fits are kept next to the source; datasets without one (built
+        # in memory) keep them in memory only.
+        source = self.dataset.source or csv_file
+        self.model_runner = CohortModelRunner(
+            cache_dir=model_cache_dir(source) if source else None)
+
+    load_dataset = staticmethod(open_dataset)
+
+    def append(self, batch: pd.DataFrame, persist: bool = True):
+        """Append new raw orders (CSV schema) and refresh this session."""
+        self.dataset = self.dataset.append(batch, persist=persist)
+        if not self.streaming:
+            self.df = self.dataset.df.copy(deep=False)
+        self.rows = slice(0, len(self.dataset))
+        self._filtered_df = self.df
+        self.memo.clear()
+        self.apply_filters()
+
+    def init_feat_df(self):
+        # Datasets arrive prepared, so this only checks that; the features
+        # are derived by ingest_csv when the source is loaded, listed
+        # under load_data.
+        if not self.streaming:
+            self.df = derive_features(self.df)
+
+    def set_filters(self, **kwargs):
+        self.filters.update(kwargs)
+        if filter_key(self.filters) != self.filter_state:
+            self.apply_filters()
+
+    def apply_filters(self):
+        if self.streaming:
+            # Aggregates always cover the whole source.
+            return
+        with self.profiler.track('apply_filters', rows_in=len(self.dataset)) as record:
+            self.rows = self.dataset.filter_engine.select(self.filters)
+            self._filtered_df = None
+            # Memoized tables are keyed by this, so a new state never sees
+            # results computed for the previous one.
+            self.filter_state = filter_key(self.filters)
+            record['rows_out'] = self.selected_rows()
+
+    def selected_rows(self) -> int:
+        if isinstance(self.rows, slice):
+            return self.rows.stop - self.rows.start
+        return len(self.rows)
+
+    @property
+    def filtered_df(self):
+        # Materialized lazily from the row selection; a pure date range is
+        # a positional slice of the base table and needs no copy.
+        with self._lock:
+            if self._filtered_df is None:
+                self._filtered_df = self.df.iloc[self.rows]
+            return self._filtered_df
+
+    def set_approximate(self, approximate: bool, precision: int = DEFAULT_PRECISION):
+        if (approximate, precision) != (self.approximate, self.sketch_precision):
+            self.approximate = approximate
+            self.sketch_precision = precision
+            self.memo.clear()
+
+    def distinct_error(self) -> float:
+        if not self.approximate or self.streaming:
+            return 0.0
+        return float(self.dataset.sketches(self.sketch_precision).error)
+
+    def distinct_count(self, column, by=None, filters=None):
+        # HyperLogLog estimate in approximate mode, exact nunique otherwise.
+        if self.streaming:
+            if by is not None:
+                return self.dataset.distinct[(column, by)]
+            summary = self.dataset.summary
+            return len(summary) if column == 'cust_id' else summary.n_orders
+
+        filters = self.filters if filters is None else filters
+        if self.approximate:
+            sketches = self.dataset.sketches(self.sketch_precision)
+            if column in sketches.columns and sketches.supports(filters) and \
+                    (by is None or by in sketches.dimensions):
+                start, stop = self.dataset.filter_engine.date_bounds(
+                    filters.get("date_range"))
+                counts = sketches.distinct(self.df, column, filters, self.rows,
+                                           start, stop, by=by)
+                return counts.round().astype(int) if by else int(round(counts))
+
+        df = self.filtered_df
+        for name, values in filters.items():
+            if name != "date_range" and values and filters is not self.filters:
+                df = df[df[name].isin(values)]
+        if by is None:
+            return df[column].nunique()
+        return df.groupby(by, observed=True)[column].nunique()
+
+    def group_totals(self, keys) -> pd.DataFrame:
+        # Revenue, quantity and row totals per group of the selection.
+        if self.streaming:
+            return self.dataset.tables[tuple(keys)]
+        return aggregate_groups(self.filtered_df, keys)
+
+    def unique_values(self, column):
+        if column in self.dataset.filter_engine.indexes:
+            return self.dataset.filter_engine.unique_values(column)
+        return sorted(self.df[column].dropna().unique())
+
+    @profiled
+    @memoized
+    def calculate_customer_summary(self) -> CustomerSummary:
+        if self.streaming:
+            return self.dataset.summary
+        return CustomerSummary(self.filtered_df)
+
+    @memoized
+    def _purchase_gaps(self):
+        if self.streaming:
+            # Gaps need every order date; aggregates keep only first/last.
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        summary = self.calculate_customer_summary()
+        codes = summary.row_codes
+        dates = self.filtered_df['order_date'].to_numpy()
+
+        # Rows are already date-sorted, so a stable sort on the customer
+        # codes yields (cust_id, order_date) order.
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        dates = dates[order]
+
+        same_customer = codes[1:] == codes[:-1]
+        gaps = (dates[1:] - dates[:-1])[same_customer] // np.timedelta64(1, 'D')
+        return summary.cust_id[codes[1:][same_customer]], gaps.astype(np.int64)
+
+    def purchase_intervals(self) -> np.ndarray:
+        return self._purchase_gaps()[1]
+
+    @profiled
+    @memoized
+    def calculate_purchase_gaps(self):
+        cust, gaps = self._purchase_gaps()
+        if len(gaps) == 0:
+            return pd.DataFrame(columns=['cust_id', 'gap_count',
+                                         'mean_gap', 'median_gap'])
+
+        # Sort gaps within each customer and pick the middle element(s).
+        order = np.lexsort((gaps, cust))
+        cust = cust[order]
+        gaps = gaps[order]
+        starts = np.flatnonzero(np.r_[True, cust[1:] != cust[:-1]])
+        counts = np.diff(np.r_[starts, len(gaps)])
+        sums = np.add.reduceat(gaps, starts)
+        lower = gaps[starts + (counts - 1) // 2]
+        upper = gaps[starts + counts // 2]
+
+        return pd.DataFrame({
+            'cust_id': cust[starts],
+            'gap_count': counts,
+            'mean_gap': sums / counts,
+            'median_gap': (lower + upper) / 2
+        })
+
+    def set_rfm_engine(self, rfm_engine: RFMEngine):
+        self.rfm_engine = rfm_engine
+        self.memo.clear()
+
+    @profiled
+    @memoized
+    def calculate_cohort_matrix(self) -> CohortMatrix:
+        if self.streaming:
+            return self.dataset.cohort_matrix
+        return CohortMatrix(self.calculate_customer_summary(), self.filtered_df)
+
+    @profiled
+    @memoized
+    def calculate_cohort_data(self):
+        return self.calculate_cohort_matrix().to_long()
+
+    @profiled
+    @memoized
+    def calculate_retention_forecast(self) -> RetentionForecast:
+        return RetentionForecast(self.calculate_cohort_data())
+
+    @profiled
+    @memoized
+    def calculate_model_forecast(self) -> pd.DataFrame:
+        # Per-cohort ETS/ARIMA fits; see ``model_runner`` for the model.
+        return self.model_runner.run(self.calculate_cohort_data())
+
+    @profiled
+    @memoized
+    def calculate_cube(self):
+        # Sums and counts over the filtered rows at (month x Region x
+        # category x status x payment_method) grain, served from the
+        # dataset's prebuilt cube whenever the filters allow it.
+        cube = self.dataset.cube
+        if self.streaming:
+            return cube.cells
+        if not cube.supports(self.filters):
+            return aggregate_cells(self.filtered_df, cube.dimensions)
+        start, stop = self.dataset.filter_engine.date_bounds(
+            self.filters.get("date_range"))
+        return cube.query(self.df, self.filters, self.rows, start, stop)
+
+    @profiled
+    @memoized
+    def calculate_rfm(self):
+        return self.rfm_engine.compute(self.calculate_customer_summary())
+
+    @profiled
+    def compute_kpis(self):
+        cells = self.calculate_cube()
+        total_items = cells['qty'].sum()
+
+        if self.approximate:
+            # Cube sums and sketches only: the exact per-customer summary
+            # is never built, so the repeat rate is not available.
+            total_revenue = cells['revenue'].sum()
+            total_customers = self.distinct_count('cust_id')
+            total_orders = self.distinct_count('order_id')
+            statuses = self.filters.get('status')
+            completed_orders = 0 if statuses and 'complete' not in statuses else \
+                self.distinct_count(
+                    'order_id', filters={**self.filters, 'status': ['complete']})
+            repeat_customers = repeat_rate = None
+        else:
+            summary = self.calculate_customer_summary()
+            total_revenue = summary.revenue.sum()
+            total_customers = len(summary)
+            total_orders = summary.n_orders
+            completed_orders = summary.n_completed_orders
+
+            # Repeat purchase rate
+            repeat_customers = (summary.order_count > 1).sum()
+            repeat_rate = (repeat_customers / len(summary) *
+                           100) if len(summary) > 0 else 0
+
+        aov = total_revenue / total_orders if total_orders > 0 else 0
+        clv = total_revenue / total_customers if total_customers > 0 else 0
+
+        # Items per order
+        items_per_order = total_items / total_orders if total_orders > 0 else 0
+
+        # Completion rate
+        completion_rate = (completed_orders / total_orders *
+                           100) if total_orders > 0 else 0
+
+        return {
+            'total_revenue': total_revenue,
+            'total_customers': total_customers,
+            'total_orders': total_orders,
+            'aov': aov,
+            'clv': clv,
+            'repeat_rate': repeat_rate,
+            'repeat_customers': repeat_customers,
+            'items_per_order': items_per_order,
+            'completion_rate': completion_rate,
+            'completed_orders': completed_orders,
+            'distinct_error': self.distinct_error()
+        }
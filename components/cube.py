@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from .cohort import month_ordinals
+
+
+CUBE_DIMENSIONS = ['Region', 'category', 'status', 'payment_method']
+
+
+def aggregate_cells(df: pd.DataFrame, dimensions, month=None) -> pd.DataFrame:
+    if month is None:
+        month = month_ordinals(df['order_date'].to_numpy())
+    keys = [pd.Series(month, index=df.index, name='month')] + \
+        [df[dimension] for dimension in dimensions]
+    cells = df.groupby(keys, observed=True, sort=False).agg(
+        revenue=('revenue', 'sum'),
+        rows=('revenue', 'size'),
+        qty=('qty_ordered', 'sum')
+    )
+    return cells.reset_index()
+
+
+def month_labels(months, fmt: str = '%B %Y') -> pd.Index:
+    return pd.PeriodIndex.from_ordinals(np.asarray(months), freq='M').strftime(fmt)
+
+
+class MonthIndex:
+    """Row range of every month in a date-sorted base table."""
+
+    def __init__(self, month: np.ndarray):
+        self.months = np.unique(month)
+        self.month_start = np.searchsorted(month, self.months, side='left')
+        self.month_stop = np.searchsorted(month, self.months, side='right')
+
+    def covered(self, start: int, stop: int):
+        """Months fully inside rows [start, stop) and their joint row range."""
+        covered = (self.month_start >= start) & (self.month_stop <= stop)
+        if not covered.any():
+            return self.months[covered], stop, stop
+        first, last = np.flatnonzero(covered)[[0, -1]]
+        return (self.months[covered], int(self.month_start[first]),
+                int(self.month_stop[last]))
+
+    @staticmethod
+    def edge_rows(rows, lo: int, hi: int) -> np.ndarray:
+        """Selected rows outside the covered range [lo, hi)."""
+        if isinstance(rows, slice):
+            return np.r_[rows.start:min(lo, rows.stop),
+                         max(hi, rows.start):rows.stop]
+        return rows[(rows < lo) | (rows >= hi)]
+
+
+class MonthlyCube:
+    """Revenue, line and quantity totals per (month x dimensions) cell.
+
+    Built once per dataset. A query serves the fully covered months of the
+    date range from the cells and folds in the raw rows of the (at most
+    two) partially covered edge months, so any day range is exact.
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensions=CUBE_DIMENSIONS):
+        self.dimensions = [d for d in dimensions if d in df.columns]
+        month = month_ordinals(df['order_date'].to_numpy())
+        self.cells = aggregate_cells(df, self.dimensions, month)
+        # The base table is date-sorted, so each month is a row range.
+        self.month_index = MonthIndex(month)
+
+    @classmethod
+    def from_cells(cls, cells: pd.DataFrame, dimensions=CUBE_DIMENSIONS):
+        # Cells folded without a base table can only be read whole.
+        cube = cls.__new__(cls)
+        cube.dimensions = [d for d in dimensions if d in cells.columns]
+        cube.cells = cells
+        cube.month_index = None
+        return cube
+
+    def updated(self, df: pd.DataFrame, months) -> "MonthlyCube":
+        """Cube of ``df`` that re-aggregates only ``months``.
+
+        ``df`` is this cube's base table plus appended rows; cells of all
+        other months are carried over unchanged.
+        """
+        cube = MonthlyCube.__new__(MonthlyCube)
+        cube.dimensions = self.dimensions
+        month = month_ordinals(df['order_date'].to_numpy())
+        cube.month_index = MonthIndex(month)
+
+        months = np.unique(np.asarray(months))
+        position = np.searchsorted(cube.month_index.months, months)
+        rows = np.concatenate([
+            np.arange(cube.month_index.month_start[i], cube.month_index.month_stop[i])
+            for i in position]) if len(months) else np.zeros(0, dtype=np.int64)
+        cells = pd.concat([
+            self.cells[~self.cells['month'].isin(months)],
+            aggregate_cells(df.iloc[rows], self.dimensions, month[rows])
+        ], ignore_index=True)
+        for dimension in self.dimensions:
+            cells[dimension] = cells[dimension].astype(df[dimension].dtype)
+        cube.cells = cells
+        return cube
+
+    def __len__(self):
+        return len(self.cells)
+
+    def supports(self, filters) -> bool:
+        return all(name == 'date_range' or name in self.dimensions
+                   for name, value in filters.items() if value)
+
+    def query(self, df: pd.DataFrame, filters, rows, start: int, stop: int) -> pd.DataFrame:
+        months, lo, hi = self.month_index.covered(start, stop)
+
+        cells = self.cells[self.cells['month'].isin(months)]
+        for dimension in self.dimensions:
+            values = filters.get(dimension)
+            if values and len(values) > 0:
+                cells = cells[cells[dimension].isin(values)]
+
+        edge_rows = self.month_index.edge_rows(rows, lo, hi)
+        if len(edge_rows) == 0:
+            return cells.reset_index(drop=True)
+
+        edge_cells = aggregate_cells(df.iloc[edge_rows], self.dimensions)
+        return pd.concat([cells, edge_cells], ignore_index=True)
@@ -0,0 +1,132 @@
+import copy
+import threading
+
+import pandas as pd
+
+from .cube import MonthlyCube
+from .filters import FilterEngine
+from .ingest import (append_csv, batch_version, cache_key, concat_prepared,
+                     derive_features, ingest_csv, store_cache)
+from .profiling import Profiler
+from .sketch import DEFAULT_PRECISION, SketchCube
+from .stream import (STREAM_CHUNKSIZE, StreamingAggregator, ingest_streaming,
+                     store_state)
+
+
+class Dataset:
+    """Prepared, read-only base table shared by every Data/Chart instance."""
+
+    __slots__ = ('source', 'version', 'df', 'filter_engine', 'cube', '_sketches',
+                 '_lock', 'load_records', '__weakref__')
+
+    def __init__(self, df: pd.DataFrame, source: str = None, version: str = None,
+                 cube: MonthlyCube = None):
+        if not df['order_date'].is_monotonic_increasing:
+            df = df.sort_values('order_date', kind='stable', ignore_index=True)
+            cube = None
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'df', df)
+        object.__setattr__(self, 'filter_engine', FilterEngine(df))
+        object.__setattr__(self, 'cube', cube or MonthlyCube(df))
+        object.__setattr__(self, '_sketches', {})
+        object.__setattr__(self, '_lock', threading.Lock())
+        # Profile of the load that produced this dataset, see from_csv.
+        object.__setattr__(self, 'load_records', ())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dataset is immutable")
+
+    def __len__(self):
+        return len(self.df)
+
+    def sketches(self, precision: int = DEFAULT_PRECISION) -> SketchCube:
+        # Built on first use, only sessions in approximate mode pay for it.
+        with self._lock:
+            if precision not in self._sketches:
+                self._sketches[precision] = SketchCube(self.df, precision)
+            return self._sketches[precision]
+
+    def append(self, batch: pd.DataFrame, persist: bool = True) -> "Dataset":
+        """New dataset with ``batch`` (raw CSV rows) appended.
+
+        Only the cube months the batch touches are re-aggregated. With
+        ``persist`` the rows are appended to the source CSV and the Parquet
+        cache is rewritten under the new version; otherwise the new version
+        is the old one qualified by a hash of the batch.
+        """
+        rows = derive_features(batch.copy())
+        df = concat_prepared([self.df, rows])
+        cube = self.cube.updated(df, rows['order_month'].unique())
+
+        version = batch_version(self.version, batch)
+        if persist and self.source:
+            append_csv(self.source, batch)
+            version = cache_key(self.source)
+            store_cache(df, self.source)
+        return Dataset(df, source=self.source, version=version, cube=cube)
+
+    @classmethod
+    def from_csv(cls, csv_file: str, profiler: Profiler = None) -> "Dataset":
+        """Load ``csv_file``; the load's records are kept in ``load_records``.
+
+        The dataset is shared by sessions that did not load it, so each
+        replays these records into its own profile.
+        """
+        profiler = profiler or Profiler()
+        df = ingest_csv(csv_file, profiler=profiler)
+        with profiler.track('build_indexes', rows_in=len(df)):
+            dataset = cls(df, source=csv_file, version=cache_key(csv_file))
+        object.__setattr__(dataset, 'load_records', tuple(profiler.records))
+        return dataset
+
+
+class AggregateDataset:
+    """Aggregates of a CSV streamed in chunks, with no row-level table.
+
+    Serves sources larger than memory; views that need individual rows
+    (filters, purchase intervals) are unavailable.
+    """
+
+    __slots__ = ('source', 'version', 'df', 'aggregator', 'n_rows', 'cube',
+                 'summary', 'cohort_matrix', 'distinct', 'tables', 'load_records')
+
+    def __init__(self, aggregator: StreamingAggregator, source: str = None,
+                 version: str = None):
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'df', None)
+        object.__setattr__(self, 'aggregator', aggregator)
+        object.__setattr__(self, 'load_records', ())
+        for name, value in aggregator.finalize().items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Dataset is immutable")
+
+    def __len__(self):
+        return self.n_rows
+
+    def append(self, batch: pd.DataFrame, persist: bool = True) -> "AggregateDataset":
+        # Folding touches only the batch's customers, orders and months;
+        # the copy keeps this dataset's aggregator unchanged.
+        aggregator = copy.deepcopy(self.aggregator)
+        aggregator.add(batch.copy())
+
+        version = batch_version(self.version, batch)
+        if persist and self.source:
+            append_csv(self.source, batch)
+            version = cache_key(self.source)
+            store_state(aggregator, self.source)
+        return AggregateDataset(aggregator, source=self.source, version=version)
+
+    @classmethod
+    def from_csv(cls, csv_file: str, chunksize: int = STREAM_CHUNKSIZE,
+                 profiler: Profiler = None) -> "AggregateDataset":
+        profiler = profiler or Profiler()
+        with profiler.track('ingest_streaming') as record:
+            aggregator = ingest_streaming(csv_file, chunksize=chunksize)
+            dataset = cls(aggregator, source=csv_file, version=cache_key(csv_file))
+            record['rows_out'] = len(dataset)
+        object.__setattr__(dataset, 'load_records', tuple(profiler.records))
+        return dataset
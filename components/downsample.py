@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+
+# Scatter plots above this many points are drawn from a sample.
+MAX_SCATTER_POINTS = 20_000
+OUTLIER_SHARE = 0.2
+MIN_PER_STRATUM = 200
+
+
+def stratified_sample(strata, columns, n: int, outlier_share: float = OUTLIER_SHARE,
+                      seed: int = 0) -> np.ndarray:
+    """Sorted positions of at most ``n`` rows that keep the plot's shape.
+
+    The extremes of every column are always kept, so outliers stay
+    visible. The rest of the budget is split across strata in proportion
+    to their size, with a floor so small strata do not vanish.
+    """
+    size = len(strata)
+    if size <= n:
+        return np.arange(size)
+    rng = np.random.default_rng(seed)
+
+    keep = np.zeros(size, dtype=bool)
+    k = int(n * outlier_share) // (2 * max(len(columns), 1))
+    for values in columns:
+        if not k:
+            break
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argpartition(values, [k, size - k - 1])
+        keep[order[:k]] = True
+        keep[order[-k:]] = True
+
+    codes, _ = pd.factorize(np.asarray(strata))
+    candidates = ~keep
+    counts = np.bincount(codes[candidates], minlength=codes.max() + 1)
+    budget = max(n - int(keep.sum()), 0)
+    # Floors come out of the budget first (scaled down when they alone
+    # exceed it), the remainder is split in proportion to what is left.
+    floor = np.minimum(counts, MIN_PER_STRATUM)
+    if floor.sum() > budget:
+        floor = np.floor(floor * budget / floor.sum()).astype(np.int64)
+    rest = counts - floor
+    quota = floor + np.floor((budget - floor.sum()) * rest /
+                             max(rest.sum(), 1)).astype(np.int64)
+
+    chosen = [np.flatnonzero(keep)]
+    for code, count in enumerate(quota):
+        if count:
+            members = np.flatnonzero(candidates & (codes == code))
+            chosen.append(rng.choice(members, size=count, replace=False))
+    return np.sort(np.concatenate(chosen))
@@ -0,0 +1,25 @@
+from .payloadcache import PayloadCache
+
+
+FIGURE_CACHE_BYTES = 128 * 2 ** 20
+FIGURE_DISK_BYTES = 1024 * 2 ** 20
+
+
+class FigureCache(PayloadCache):
+    """Process-wide cache of serialized (JSON) figures.
+
+    Shared by every session, so users on the same dataset version and
+    filter state reuse each other's figures. With ``directory`` set,
+    figures are also kept on disk and survive restarts.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES, directory: str = None,
+                 max_disk_bytes: int = FIGURE_DISK_BYTES):
+        super().__init__(max_bytes, directory=directory, max_disk_bytes=max_disk_bytes,
+                         suffix='.json')
+
+    def get_or_render(self, key, render) -> str:
+        return self.get_or_compute(key, render)
+
+
+figure_cache = FigureCache()
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+FILTER_COLUMNS = ["Region", "category", "status"]
+
+
+class BitmapIndex:
+    """Packed row bitmaps for every distinct value of one dimension."""
+
+    def __init__(self, values: pd.Series):
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        codes = values.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0],
+                             minlength=len(values.cat.categories))
+
+        self.n_rows = len(codes)
+        self.has_missing = bool((codes < 0).any())
+        self.values = []
+        self.bitmaps = {}
+        for code, value in enumerate(values.cat.categories):
+            if counts[code] == 0:
+                continue
+            self.values.append(value)
+            self.bitmaps[value] = np.packbits(codes == code)
+        self.values.sort()
+
+    def covers(self, values) -> bool:
+        return not self.has_missing and set(self.values) <= set(values)
+
+    def union(self, values, byte_start=0, byte_stop=None):
+        if byte_stop is None:
+            byte_stop = (self.n_rows + 7) // 8
+        result = np.zeros(byte_stop - byte_start, dtype=np.uint8)
+        for value in values:
+            bitmap = self.bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap[byte_start:byte_stop], out=result)
+        return result
+
+
+class FilterEngine:
+    """Resolves a filter state to row positions of a date-sorted base table.
+
+    The date range becomes a contiguous slice found with searchsorted and
+    the dimension filters are answered by OR-ing the selected values'
+    bitmaps and AND-ing across dimensions, only over the bytes that cover
+    that slice.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=FILTER_COLUMNS):
+        self.n_rows = len(df)
+        self.order_date = df['order_date'].array
+        self.indexes = {
+            column: BitmapIndex(df[column])
+            for column in columns if column in df.columns
+        }
+
+    def unique_values(self, column):
+        return list(self.indexes[column].values)
+
+    def date_bounds(self, date_range):
+        if not date_range or len(date_range) != 2:
+            return 0, self.n_rows
+        start_date = pd.to_datetime(date_range[0])
+        end_date = pd.to_datetime(date_range[1])
+        start = int(self.order_date.searchsorted(start_date, side='left'))
+        stop = int(self.order_date.searchsorted(end_date, side='right'))
+        return start, max(start, stop)
+
+    def select(self, filters):
+        """Return a slice or an int64 position array for the filter state."""
+        start, stop = self.date_bounds(filters.get("date_range"))
+        byte_start, byte_stop = start // 8, (stop + 7) // 8
+
+        bits = None
+        for column, index in self.indexes.items():
+            values = filters.get(column)
+            if not values or len(values) == 0 or index.covers(values):
+                continue
+            column_bits = index.union(values, byte_start, byte_stop)
+            bits = column_bits if bits is None else \
+                np.bitwise_and(bits, column_bits, out=bits)
+
+        if bits is None:
+            return slice(start, stop)
+        offset = byte_start * 8
+        mask = np.unpackbits(bits, count=stop - offset)[start - offset:]
+        return np.flatnonzero(mask) + start
@@ -0,0 +1,215 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+FORECAST_HORIZON = 6
+CONFIDENCE = 0.9
+# Cohorts with fewer observed ages borrow the slope pooled over all cohorts.
+MIN_POINTS = 3
+AT_RISK_SHARE = 0.25
+RECENT_MONTHS = 3
+
+EXPORT_FILES = {
+    'predictions': 'cohort_predictions.csv',
+    'ltv_predictions': 'cohort_ltv_predictions.csv',
+    'at_risk_cohorts': 'at_risk_cohorts.csv',
+}
+
+
+class RetentionForecast:
+    """Log-linear retention curves fitted to every cohort in one pass.
+
+    Built from ``Chart.calculate_cohort_data``. Each cohort's retention
+    after month 0 is modelled as ``a * exp(-b * cohort_age)``, i.e. a
+    straight line in log space, so all fits are closed-form least squares
+    over a dense (cohort x age) matrix with a mask of the observed ages.
+    Cohorts too young for their own slope use the slope pooled within all
+    cohorts with their own level; prediction intervals come from the
+    residual variance of whichever fit a cohort uses.
+    """
+
+    def __init__(self, cohort_data: pd.DataFrame, horizon: int = FORECAST_HORIZON,
+                 confidence: float = CONFIDENCE, min_points: int = MIN_POINTS):
+        self.horizon = horizon
+        self.confidence = confidence
+
+        cohort = cohort_data['cohort_month'].array.asi8
+        order = cohort_data['order_month'].array.asi8
+        if len(cohort):
+            self.first_cohort = int(cohort.min())
+            n_cohorts = int(cohort.max()) - self.first_cohort + 1
+            n_ages = int(order.max()) - self.first_cohort + 1
+        else:
+            self.first_cohort, n_cohorts, n_ages = 0, 0, 0
+        row = cohort - self.first_cohort
+        age = cohort_data['cohort_age'].to_numpy()
+
+        self.size = np.zeros(n_cohorts)
+        self.size[row] = cohort_data['cohort_size'].to_numpy()
+        self.active = np.zeros((n_cohorts, n_ages))
+        self.active[row, age] = cohort_data['active_customers'].to_numpy()
+        self.revenue = np.zeros((n_cohorts, n_ages))
+        if 'revenue' in cohort_data.columns:
+            self.revenue[row, age] = cohort_data['revenue'].to_numpy()
+
+        # Ages up to the selection's last month are observed; months with
+        # no returning customer are observed zeros, not gaps.
+        self.ages = np.arange(n_ages)
+        self.last_age = n_ages - 1 - np.arange(n_cohorts)
+        self.present = self.size > 0
+        self._fit(min_points)
+
+    def _fit(self, min_points: int):
+        x = self.ages[None, :].astype(float)
+        observed = (x >= 1) & (x <= self.last_age[:, None]) & self.present[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Half a customer keeps months with no returns finite in logs.
+            y = np.log((self.active + 0.5) / (self.size[:, None] + 1))
+        y = np.where(observed, y, 0.0)
+        w = observed.astype(float)
+
+        n = w.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = (w * x).sum(axis=1) / n
+            y_mean = (w * y).sum(axis=1) / n
+        dx = np.where(observed, x - x_mean[:, None], 0.0)
+        dy = np.where(observed, y - y_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        sxy = (dx * dy).sum(axis=1)
+
+        own = (n >= max(min_points, 3)) & (sxx > 0)
+        pooled_sxx = sxx[n >= 2].sum()
+        pooled_slope = sxy[n >= 2].sum() / pooled_sxx if pooled_sxx > 0 else 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(own, sxy / sxx, pooled_slope)
+        # Decay curves: retention is not projected to grow.
+        slope = np.minimum(slope, 0.0)
+
+        has_points = n > 0
+        intercept = y_mean - slope * x_mean
+        fallback = np.median(intercept[has_points]) if has_points.any() else 0.0
+        intercept = np.where(has_points, intercept, fallback)
+
+        residual = np.where(observed, y - intercept[:, None] - slope[:, None] * x, 0.0)
+        sse = (residual * residual).sum(axis=1)
+        pooled_df = (n[n >= 2] - 2).sum()
+        pooled_var = sse[n >= 2].sum() / pooled_df if pooled_df > 0 else 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            own_var = sse / (n - 2)
+
+        self.observed = observed
+        self.n_points = n
+        self.own_fit = own
+        self.slope = slope
+        self.intercept = intercept
+        self.variance = np.where(own, own_var, pooled_var)
+        self.dof = np.where(own, n - 2, max(pooled_df, 1))
+        self.x_mean = np.where(has_points, x_mean,
+                               x_mean[has_points].mean() if has_points.any() else 0.0)
+        self.sxx = np.where(own, sxx, pooled_sxx if pooled_sxx > 0 else np.inf)
+        self.n_eff = np.maximum(n, 1)
+
+    def curves(self, ages) -> tuple:
+        """(estimate, lower, upper) retention in % at ``ages`` per cohort."""
+        ages = np.asarray(ages, dtype=float)
+        if ages.ndim == 1:
+            ages = np.broadcast_to(ages, (len(self.size), len(ages)))
+        log_rate = self.intercept[:, None] + self.slope[:, None] * ages
+        se = np.sqrt(self.variance[:, None] * (
+            1 + 1 / self.n_eff[:, None]
+            + (ages - self.x_mean[:, None]) ** 2 / self.sxx[:, None]))
+        # Imported here: scipy adds most of a second to importing the core.
+        from scipy.special import stdtrit
+        t = stdtrit(self.dof, 0.5 + self.confidence / 2)[:, None]
+        return tuple(np.clip(np.exp(values) * 100, 0, 100)
+                     for values in (log_rate, log_rate - t * se, log_rate + t * se))
+
+    def _future_ages(self) -> np.ndarray:
+        return self.last_age[:, None] + 1 + np.arange(self.horizon)[None, :]
+
+    def _cohort_index(self, rows) -> pd.PeriodIndex:
+        return pd.PeriodIndex.from_ordinals(self.first_cohort + rows, freq='M')
+
+    def predictions(self) -> pd.DataFrame:
+        """Forecast retention for the ``horizon`` months after each cohort's last."""
+        ages = self._future_ages()
+        estimate, lower, upper = self.curves(ages)
+        rows = np.repeat(np.flatnonzero(self.present), self.horizon)
+        return pd.DataFrame({
+            'cohort_month': self._cohort_index(rows),
+            'cohort_age': ages[self.present].ravel(),
+            'predicted_retention': estimate[self.present].ravel(),
+            'lower_bound': lower[self.present].ravel(),
+            'upper_bound': upper[self.present].ravel(),
+            'predicted_active_customers': (estimate[self.present] / 100 *
+                                           self.size[self.present, None]).ravel(),
+        })
+
+    def ltv_predictions(self) -> pd.DataFrame:
+        """Revenue to date plus the forecast horizon's expected revenue."""
+        present = self.present
+        historical = self.revenue.sum(axis=1)
+        # Forecast months are repeat months, valued at the cohort's revenue
+        # per returning customer (pooled over cohorts for the youngest).
+        repeat_revenue = np.where(self.observed, self.revenue, 0.0).sum(axis=1)
+        repeat_active = np.where(self.observed, self.active, 0.0).sum(axis=1)
+        pooled = repeat_revenue.sum() / repeat_active.sum() if repeat_active.sum() else 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_active = np.where(repeat_active > 0, repeat_revenue / repeat_active, pooled)
+        estimate, _, _ = self.curves(self._future_ages())
+        future = per_active * (estimate / 100 * self.size[:, None]).sum(axis=1)
+        total = historical + future
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_customer = total / self.size
+
+        frame = pd.DataFrame({
+            'cohort_month': self._cohort_index(np.flatnonzero(present)),
+            'cohort_size': self.size[present].astype(np.int64),
+            'historical_revenue': historical[present],
+            'predicted_future_revenue': future[present],
+            'total_predicted_ltv': total[present],
+            'ltv_per_customer': per_customer[present],
+        })
+        return frame.sort_values('total_predicted_ltv', ascending=False,
+                                 ignore_index=True)
+
+    def at_risk_cohorts(self, share: float = AT_RISK_SHARE) -> pd.DataFrame:
+        """Cohorts in the bottom ``share`` of mean forecast retention.
+
+        ``recent_decline`` is the drop in observed retention, in points,
+        over the cohort's last ``RECENT_MONTHS`` months.
+        """
+        estimate, _, _ = self.curves(self._future_ages())
+        predicted = estimate.mean(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            retention = self.active / self.size[:, None] * 100
+        rows = np.arange(len(self.size))
+        last = np.maximum(self.last_age, 0)
+        start = np.maximum(last - RECENT_MONTHS, np.minimum(last, 1))
+        decline = retention[rows, start] - retention[rows, last]
+
+        candidates = self.present & (self.last_age >= 1)
+        if not candidates.any():
+            return pd.DataFrame(columns=['cohort_month', 'cohort_size',
+                                         'predicted_retention', 'recent_decline'])
+        cutoff = np.quantile(predicted[candidates], share)
+        risky = np.flatnonzero(candidates & (predicted <= cutoff))
+        frame = pd.DataFrame({
+            'cohort_month': self._cohort_index(risky),
+            'cohort_size': self.size[risky].astype(np.int64),
+            'predicted_retention': predicted[risky],
+            'recent_decline': decline[risky],
+        })
+        return frame.sort_values('predicted_retention', ignore_index=True)
+
+    def export(self, directory: str) -> dict:
+        """Write the three prediction CSVs; returns their paths by table."""
+        os.makedirs(directory, exist_ok=True)
+        paths = {}
+        for table, file_name in EXPORT_FILES.items():
+            paths[table] = os.path.join(directory, file_name)
+            getattr(self, table)().to_csv(paths[table], index=False)
+        return paths
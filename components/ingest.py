@@ -0,0 +1,236 @@
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .cohort import month_ordinals
+from .profiling import Profiler
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - the cache is optional
+    pa = None
+    ipc = None
+    pq = None
+
+
+# Bump whenever derive_features changes so stale caches are rebuilt.
+CACHE_VERSION = 4
+CACHE_DIR_NAME = ".cache"
+ARROW_SUFFIX = ".arrow"
+# cache_key's hex digest; in-memory appends add "+<digest>" per batch.
+KEY_PATTERN = r"[0-9a-f]{16}"
+
+CATEGORICAL_COLUMNS = ['Region', 'category', 'status',
+                       'payment_method', 'Gender', 'sku']
+# Downcast after revenue is derived, so revenue keeps full precision.
+INTEGER_COLUMNS = ['qty_ordered', 'age']
+FLOAT_COLUMNS = ['price', 'discount_amount']
+
+
+def is_prepared(df: pd.DataFrame) -> bool:
+    return 'revenue' in df.columns and \
+        pd.api.types.is_datetime64_any_dtype(df['order_date'])
+
+
+def derive_features(df: pd.DataFrame, profiler: Profiler = None) -> pd.DataFrame:
+    if is_prepared(df):
+        return df
+    with (profiler or Profiler(enabled=False)).track('derive_features',
+                                                     rows_in=len(df)) as record:
+        df = _derive(df)
+        record['rows_out'] = len(df)
+    return df
+
+
+def _derive(df: pd.DataFrame) -> pd.DataFrame:
+    df['order_date'] = pd.to_datetime(df['order_date'], format='%d-%m-%Y')
+    df['customer_since'] = pd.to_datetime(
+        df['Customer Since'], format='%m/%d/%Y', errors='coerce')
+
+    df = df.drop(columns='Customer Since')
+
+    df['revenue'] = (df['qty_ordered'] * df['price']) - df['discount_amount']
+
+    # Months are int32 ordinals (months since 1970-01, as Period('M') uses)
+    # and weekdays are 0 = Monday; labels are made at plot time.
+    df['order_month'] = month_ordinals(df['order_date'].to_numpy()).astype(np.int32)
+    missing = df['customer_since'].isna().to_numpy()
+    cohort_month = month_ordinals(df['customer_since'].to_numpy())
+    df['cohort_month'] = pd.arrays.IntegerArray(
+        np.where(missing, 0, cohort_month).astype(np.int32), missing)
+    df['order_year'] = df['order_date'].dt.year.astype(np.int16)
+    df['day_of_week'] = df['order_date'].dt.dayofweek.astype(np.int8)
+    df['hour'] = df['order_date'].dt.hour.astype(np.int8)
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in INTEGER_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    for column in FLOAT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(np.float32)
+
+    # Presorted by date so range filters are a searchsorted slice.
+    return df.sort_values('order_date', kind='stable', ignore_index=True)
+
+
+def concat_prepared(frames) -> pd.DataFrame:
+    # Unions categories first, so categoricals survive the concat (and the
+    # categories stay sorted, as astype('category') produces them).
+    frames = list(frames)
+    for column in CATEGORICAL_COLUMNS:
+        if column in frames[0].columns:
+            categories = union_categoricals(
+                [frame[column] for frame in frames], sort_categories=True).categories
+            frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)})
+                      for frame in frames]
+    df = pd.concat(frames, ignore_index=True)
+    if not df['order_date'].is_monotonic_increasing:
+        df = df.sort_values('order_date', kind='stable', ignore_index=True)
+    return df
+
+
+def append_csv(csv_file: str, batch: pd.DataFrame):
+    """Append raw rows to the source CSV, in its column order."""
+    columns = pd.read_csv(csv_file, nrows=0).columns
+    with open(csv_file, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    batch.reindex(columns=columns).to_csv(csv_file, mode='a', header=False,
+                                          index=False)
+
+
+def cache_key(csv_file: str) -> str:
+    stat = os.stat(csv_file)
+    raw = f"{os.path.abspath(csv_file)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_VERSION}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def batch_version(version: str, batch: pd.DataFrame) -> str:
+    """Version of ``version``'s data with ``batch`` appended in memory only."""
+    if version is None:
+        return None
+    hashed = pd.util.hash_pandas_object(batch, index=False).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    return f"{version}+{digest.hexdigest()[:16]}"
+
+
+def cache_path(csv_file: str, cache_dir: str = None, suffix: str = '.parquet',
+               version: str = None) -> str:
+    cache_dir = cache_dir or os.path.join(
+        os.path.dirname(os.path.abspath(csv_file)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(csv_file))[0]
+    return os.path.join(cache_dir, f"{stem}-{version or cache_key(csv_file)}{suffix}")
+
+
+def remove_stale(path: str, suffix: str = '.parquet', keep=()):
+    # Other versions of path's source go, except the file names in keep.
+    # Matched on the exact "<stem>-<key><suffix>" form, so a source named
+    # "<stem>-2022.csv" keeps its own files.
+    cache_dir, name = os.path.split(path)
+    stem = name[:-len(suffix)].rsplit('-', 1)[0]
+    pattern = re.compile(rf"{re.escape(stem)}-{KEY_PATTERN}(\+{KEY_PATTERN})*{re.escape(suffix)}")
+    for other in os.listdir(cache_dir):
+        if other == name or other in keep or not pattern.fullmatch(other):
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, other))
+        except OSError:
+            pass
+
+
+def write_cache(df: pd.DataFrame, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+    remove_stale(path)
+
+
+def read_cache(path: str) -> pd.DataFrame:
+    return pq.read_table(path, memory_map=True).to_pandas()
+
+
+def share_table(df: pd.DataFrame, csv_file: str, version: str, live=()) -> str:
+    """Path of an uncompressed Arrow IPC copy of ``df`` for ``map_table``.
+
+    Written once per dataset version, next to the Parquet cache; when one
+    is written, the files of the source's other versions are removed unless
+    they are in ``live``. None without pyarrow or when the cache directory
+    is not writable.
+    """
+    if pa is None:
+        return None
+    path = cache_path(csv_file, suffix=ARROW_SUFFIX, version=version)
+    if os.path.exists(path):
+        return path
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except OSError:
+        return None
+    keep = {os.path.basename(cache_path(csv_file, suffix=ARROW_SUFFIX, version=other))
+            for other in live}
+    remove_stale(path, suffix=ARROW_SUFFIX, keep=keep)
+    return path
+
+
+def map_table(path: str) -> pd.DataFrame:
+    """``share_table``'s frame, memory-mapped rather than read.
+
+    Fixed-width columns (all but the nullable cohort month) are read-only
+    views of the mapping, so processes that map the same file share one
+    copy of it in the page cache.
+    """
+    with pa.memory_map(path) as source:
+        table = ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def ingest_csv(csv_file: str, cache_dir: str = None,
+               profiler: Profiler = None) -> pd.DataFrame:
+    """Prepared table of ``csv_file``, from the Parquet cache when current.
+
+    Reading, deriving and caching are recorded on ``profiler``.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    path = cache_path(csv_file, cache_dir) if pq is not None else None
+    if path is not None and os.path.exists(path):
+        with profiler.track('read_cache') as record:
+            df = read_cache(path)
+            record['rows_out'] = len(df)
+        return df
+
+    with profiler.track('read_csv') as record:
+        raw = pd.read_csv(csv_file, low_memory=False)
+        record['rows_out'] = len(raw)
+    df = derive_features(raw, profiler)
+    if path is not None:
+        with profiler.track('write_cache', rows_in=len(df)):
+            store_cache(df, csv_file, cache_dir)
+    return df
+
+
+def store_cache(df: pd.DataFrame, csv_file: str, cache_dir: str = None):
+    if pq is None:
+        return
+    try:
+        write_cache(df, cache_path(csv_file, cache_dir))
+    except OSError:
+        # Read-only deployments still work, they just parse every cold start.
+        pass
@@ -0,0 +1,92 @@
+import functools
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+MEMO_SIZE = 16
+
+
+def normalize_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        items = [normalize_value(item) for item in value]
+        return tuple(items) if isinstance(value, tuple) else tuple(sorted(items, key=str))
+    if hasattr(value, 'isoformat'):
+        return pd.Timestamp(value).isoformat()
+    return value
+
+
+def filter_key(filters: dict) -> tuple:
+    # Empty selections mean "no filter", same as None.
+    return tuple(
+        (name, normalize_value(value) if value else None)
+        for name, value in sorted(filters.items())
+    )
+
+
+class MemoCache:
+    """Small LRU of derived tables keyed by (filter state, table name).
+
+    Safe to share between threads: concurrent requests for the same key
+    wait for a single computation instead of repeating it.
+    """
+
+    def __init__(self, maxsize: int = MEMO_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def _lookup(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        return False, None
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            key_lock = self.pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.lock:
+                found, value = self._lookup(key)
+                if found:
+                    return value
+                self.misses += 1
+            try:
+                value = compute()
+            except BaseException:
+                with self.lock:
+                    self.pending.pop(key, None)
+                raise
+            with self.lock:
+                self.entries[key] = value
+                self.pending.pop(key, None)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def memoized(method):
+    """Cache a no-argument Data method per filter state."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        return self.memo.get_or_compute(
+            (self.filter_state, name), lambda: method(self))
+
+    return wrapper
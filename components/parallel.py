@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .charts import Chart, FigureSpec
+from .dataset import Dataset
+from .ingest import map_table, share_table
+
+
+RENDER_WORKERS = min(16, os.cpu_count() or 1)
+# Versions a worker process keeps mapped, with their Charts and memos.
+WORKER_VERSIONS = 3
+
+_lock = threading.Lock()
+# Sessions on one version wait for a single writer of its shared table.
+_share_lock = threading.Lock()
+# Datasets whose table was shared, while some session still holds them;
+# the Arrow files of every other version are removed.
+_shared = weakref.WeakValueDictionary()
+_thread_pools = {}
+_process_pools = {}
+# Per worker process: a Chart per recently rendered version, oldest first.
+_worker_charts = OrderedDict()
+
+
+def _thread_pool(max_workers: int) -> ThreadPoolExecutor:
+    # Shared by every session, so concurrent reruns queue for the same
+    # threads instead of each starting their own.
+    with _lock:
+        if max_workers not in _thread_pools:
+            _thread_pools[max_workers] = ThreadPoolExecutor(
+                max_workers, thread_name_prefix='chart')
+        return _thread_pools[max_workers]
+
+
+def run_batch(data, names, call=None, max_workers: int = RENDER_WORKERS) -> dict:
+    """Results of the ``names`` methods of ``data``, computed concurrently.
+
+    The methods only read the shared dataset; tables several of them need
+    are computed once through the memo, the other callers wait for it.
+    ``call(name)`` replaces the plain method call (e.g. ``Chart.figure``).
+    Everything has finished when this returns, in ``names`` order.
+    """
+    call = call or (lambda name: getattr(data, name)())
+    profiler = data.profiler
+    with profiler.track('batch', rows_in=data.selected_rows()) as record:
+        if max_workers <= 1 or len(names) <= 1:
+            return {name: call(name) for name in names}
+
+        depth = profiler.depth
+
+        def task(name):
+            # Worker threads record their calls under this batch.
+            profiler.depth = depth
+            try:
+                return call(name)
+            finally:
+                profiler.depth = 0
+
+        pool = _thread_pool(max_workers)
+        futures = {name: pool.submit(task, name) for name in names}
+        record['workers'] = max_workers
+        return {name: future.result() for name, future in futures.items()}
+
+
+def render_figures(chart: Chart, names, processes: bool = False,
+                   max_workers: int = RENDER_WORKERS) -> dict:
+    """Figures for ``names``, built concurrently before any is rendered.
+
+    Threads suit most charts: numpy and pandas release the GIL in their
+    heavy loops and the session's memo is shared. With ``processes`` the
+    figures missing from the figure cache are built in worker processes
+    instead, for groupbys that hold the GIL; the workers memory-map one
+    shared Arrow copy of the table rather than each loading their own.
+    """
+    dataset = chart.dataset
+    if processes and max_workers > 1 and not chart.streaming \
+            and dataset.version is not None:
+        with _share_lock:
+            _shared[id(dataset)] = dataset
+            live = {other.version for other in list(_shared.values())
+                    if other.source == dataset.source}
+            path = share_table(dataset.df, dataset.source, dataset.version, live=live)
+        if path is not None:
+            return _render_in_processes(chart, path, names, max_workers)
+    return run_batch(chart, names, call=chart.figure, max_workers=max_workers)
+
+
+def _chart_options(chart: Chart) -> dict:
+    return {
+        'theme': chart.theme,
+        'theme_base': chart.theme_base,
+        'rfm_engine': chart.rfm_engine,
+        'approximate': chart.approximate,
+        'sketch_precision': chart.sketch_precision,
+        'max_scatter_points': chart.max_scatter_points,
+        'filters': dict(chart.filters),
+    }
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    with _lock:
+        if max_workers not in _process_pools:
+            # Spawned, not forked: the server process runs threads.
+            _process_pools[max_workers] = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _process_pools[max_workers]
+
+
+def _worker_for(path: str, source: str, version: str) -> Chart:
+    # A worker keeps the Charts of the last few tables it mapped, with their
+    # memos, so sessions on different versions do not remap each other's;
+    # only the file path, filter state and chart names cross the process
+    # boundary.
+    chart = _worker_charts.pop(version, None)
+    if chart is None:
+        dataset = Dataset(map_table(path), source=source, version=version)
+        chart = Chart(source, figure_cache=None, dataset=dataset)
+        chart.profiler.enabled = False
+        while len(_worker_charts) >= WORKER_VERSIONS:
+            _worker_charts.popitem(last=False)
+    _worker_charts[version] = chart
+    return chart
+
+
+def _render_json(path: str, source: str, version: str, options: dict, name: str) -> str:
+    chart = _worker_for(path, source, version)
+    chart.theme = options['theme']
+    chart.theme_base = options['theme_base']
+    if options['rfm_engine'].cache_key() != chart.rfm_engine.cache_key():
+        chart.set_rfm_engine(options['rfm_engine'])
+    chart.set_approximate(options['approximate'], options['sketch_precision'])
+    chart.max_scatter_points = options['max_scatter_points']
+    chart.set_filters(**options['filters'])
+    return getattr(chart, name)().to_json()
+
+
+def _render_in_processes(chart: Chart, path: str, names, max_workers: int) -> dict:
+    cache = chart.figure_cache
+    payloads = {}
+    with chart.profiler.track('batch', rows_in=chart.selected_rows()) as record:
+        missing = []
+        for name in names:
+            payload = cache.get(chart.figure_key(name)) if cache is not None else None
+            if payload is None:
+                missing.append(name)
+            else:
+                payloads[name] = payload
+
+        pool = _process_pool(max_workers)
+        options = _chart_options(chart)
+        futures = {name: pool.submit(_render_json, path, chart.dataset.source,
+                                     chart.dataset.version, options, name)
+                   for name in missing}
+        for name, future in futures.items():
+            payloads[name] = future.result()
+            if cache is not None:
+                cache.put(chart.figure_key(name), payloads[name])
+        record['workers'] = max_workers
+        record['computed'] = len(missing)
+    return {name: FigureSpec(payloads[name]) for name in names}
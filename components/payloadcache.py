@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def key_digest(key) -> str:
+    # Keys are tuples of strings, numbers and nested tuples, so their repr
+    # is stable across processes and can name files on disk.
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class PayloadCache:
+    """Thread-safe LRU of string payloads, bounded by their total size.
+
+    Keys are hashed with ``key_digest``. With ``directory`` set, new
+    payloads are also written there as ``<digest><suffix>`` files (bounded
+    by ``max_disk_bytes`` unless it is None, oldest removed first), so they outlive the
+    process and are found again after eviction.
+    """
+
+    def __init__(self, max_bytes: int, directory: str = None,
+                 max_disk_bytes: int = None, suffix: str = '.json'):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}{self.suffix}")
+
+    def get(self, key):
+        digest = key_digest(key)
+        with self.lock:
+            if digest in self.entries:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return self.entries[digest]
+
+        if self.directory:
+            try:
+                with open(self._path(digest)) as f:
+                    payload = f.read()
+            except OSError:
+                payload = None
+            if payload is not None:
+                self._remember(digest, payload)
+                with self.lock:
+                    self.hits += 1
+                return payload
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, payload: str):
+        digest = key_digest(key)
+        self._remember(digest, payload)
+        if self.directory:
+            self._write(digest, payload)
+
+    def get_or_compute(self, key, compute) -> str:
+        payload = self.get(key)
+        if payload is None:
+            payload = compute()
+            self.put(key, payload)
+        return payload
+
+    def _remember(self, digest: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if digest in self.entries:
+                self.nbytes -= len(self.entries.pop(digest))
+            self.entries[digest] = payload
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def _write(self, digest: str, payload: str):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(digest)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError:
+            pass
+
+    def _prune_disk(self):
+        if self.max_disk_bytes is None:
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
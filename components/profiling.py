@@ -0,0 +1,185 @@
+import contextlib
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+
+PROFILE_SIZE = 2000
+
+# tracemalloc is process-wide: profilers share it, counted under the lock,
+# and leave it alone when something else started it.
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_started = False
+_trace_acquired = 0
+
+
+def _acquire_tracing() -> tuple:
+    global _trace_users, _trace_started, _trace_acquired
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started = True
+        _trace_users += 1
+        _trace_acquired += 1
+        # Sole user: nobody else's allocations or peak resets interleave.
+        return _trace_acquired, _trace_users == 1 and _trace_started
+
+
+def _release_tracing(token: tuple) -> bool:
+    """True when the traced span had tracemalloc to itself throughout."""
+    global _trace_users, _trace_started
+    acquired, sole = token
+    with _trace_lock:
+        exclusive = sole and _trace_acquired == acquired
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+        return exclusive
+
+
+def output_rows(result):
+    # Figures report the points they draw; tables and arrays their length.
+    traces = getattr(result, 'data', None)
+    if isinstance(traces, tuple):
+        points = 0
+        for trace in traces:
+            for attribute in ('x', 'values', 'z'):
+                values = getattr(trace, attribute, None)
+                if values is not None:
+                    points += len(values)
+                    break
+        return points
+    if isinstance(result, dict):
+        return None
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+class Profiler:
+    """Wall time, rows in/out and memory of instrumented calls.
+
+    Records are grouped by run (one Streamlit rerun) and kept in a bounded
+    buffer. Memory is traced only with ``track_memory``, since tracemalloc
+    slows every allocation while it is on; spans that overlapped another
+    profiler's tracing report no memory, as tracemalloc is process-wide.
+    Nesting depth is kept per thread, so calls made from a worker pool
+    nest under their own task.
+    """
+
+    def __init__(self, maxsize: int = PROFILE_SIZE, enabled: bool = True,
+                 track_memory: bool = False):
+        self.records = deque(maxlen=maxsize)
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.run = 0
+        self._local = threading.local()
+
+    @property
+    def depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    @depth.setter
+    def depth(self, value: int):
+        self._local.depth = value
+
+    def start_run(self):
+        self.run += 1
+
+    @contextlib.contextmanager
+    def track(self, name: str, rows_in: int = None, **fields):
+        if not self.enabled:
+            yield {}
+            return
+
+        record = {'run': self.run, 'name': name, 'depth': self.depth,
+                  'rows_in': rows_in, 'rows_out': None, **fields}
+        # Appended on entry, so nested calls list under their caller.
+        self.records.append(record)
+        top = self.depth == 0
+        token = _acquire_tracing() if top and self.track_memory else None
+        if token is not None and token[1]:
+            tracemalloc.reset_peak()
+        tracing = self.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.get_traced_memory()[0]
+
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self.depth -= 1
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record['alloc_mb'] = (current - before) / 2 ** 20
+                if top:
+                    record['peak_mb'] = (peak - before) / 2 ** 20
+            if token is not None and not _release_tracing(token):
+                # Other sessions traced at the same time; their allocations
+                # are in these numbers, so none are reported.
+                self._drop_memory(record)
+            record['timestamp'] = datetime.now().isoformat(timespec='milliseconds')
+
+    def _drop_memory(self, record: dict):
+        # record and everything recorded after it, i.e. its nested calls.
+        for other in reversed(list(self.records)):
+            other.pop('alloc_mb', None)
+            other.pop('peak_mb', None)
+            if other is record:
+                break
+
+    def replay(self, records, **fields):
+        """Add ``records`` of another profiler to this run, nested here.
+
+        Used for work done once for many sessions, such as loading the
+        shared dataset; ``fields`` are set on every copied record.
+        """
+        if not self.enabled:
+            return
+        for record in records:
+            self.records.append({**record, **fields, 'run': self.run,
+                                 'depth': self.depth + record['depth']})
+
+    def last_run(self) -> list:
+        return [record for record in self.records if record['run'] == self.run]
+
+    def jsonl(self) -> str:
+        return ''.join(json.dumps(record, default=str) + '\n'
+                       for record in self.records)
+
+    def export(self, path: str):
+        with open(path, 'a') as f:
+            f.write(self.jsonl())
+
+    def clear(self):
+        self.records.clear()
+
+
+def profiled(method):
+    """Record a Data method's calls on ``self.profiler``."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, 'profiler', None)
+        if profiler is None or not profiler.enabled:
+            return method(self, *args, **kwargs)
+
+        misses = self.memo.misses
+        with profiler.track(name, rows_in=self.selected_rows()) as record:
+            result = method(self, *args, **kwargs)
+            record['rows_out'] = output_rows(result)
+            # Tables computed (not served from the memo) during the call.
+            record['computed'] = self.memo.misses - misses
+        return result
+
+    return wrapper
@@ -0,0 +1,86 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .summary import CustomerSummary
+
+
+# Applied top to bottom; a later matching rule overrides an earlier one.
+# Thresholds are numbers, 'median', or 'q<fraction>' (e.g. 'q0.8') taken
+# over the scored customers.
+SEGMENT_RULES = [
+    ('High Value', {'frequency': ('>=', 3), 'monetary': ('>=', 'median')}),
+    ('At Risk', {'recency': ('>', 90), 'frequency': ('>=', 2)}),
+    ('New', {'frequency': ('==', 1)}),
+]
+DEFAULT_SEGMENT = 'Low Value'
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def quantile_scores(values: np.ndarray, bins: int, ascending: bool = True) -> np.ndarray:
+    # Average ranks keep tied customers (e.g. all one-time buyers) together.
+    pct = pd.Series(values).rank(method='average', pct=True,
+                                 ascending=ascending).to_numpy()
+    return np.clip(np.ceil(pct * bins), 1, bins).astype(np.int8)
+
+
+class RFMEngine:
+    def __init__(self, bins: int = 5, rules=SEGMENT_RULES,
+                 default_segment: str = DEFAULT_SEGMENT):
+        self.bins = bins
+        self.rules = rules
+        self.default_segment = default_segment
+
+    def cache_key(self) -> str:
+        return repr((self.bins, self.rules, self.default_segment))
+
+    def threshold(self, rfm: pd.DataFrame, column: str, value):
+        if value == 'median':
+            return rfm[column].median()
+        if isinstance(value, str) and value.startswith('q'):
+            return rfm[column].quantile(float(value[1:]))
+        return value
+
+    def segment(self, rfm: pd.DataFrame) -> np.ndarray:
+        labels = [self.default_segment]
+        codes = np.zeros(len(rfm), dtype=np.int8)
+        for label, conditions in self.rules:
+            mask = np.ones(len(rfm), dtype=bool)
+            for column, (op, value) in conditions.items():
+                mask &= OPERATORS[op](rfm[column].to_numpy(),
+                                      self.threshold(rfm, column, value))
+            if label not in labels:
+                labels.append(label)
+            codes[mask] = labels.index(label)
+        return np.asarray(labels, dtype=object)[codes]
+
+    def compute(self, summary: CustomerSummary, current_date=None) -> pd.DataFrame:
+        if current_date is None:
+            current_date = summary.last_order.max() if len(summary) \
+                else np.datetime64('NaT')
+
+        rfm = pd.DataFrame({
+            'cust_id': summary.cust_id,
+            'recency': (current_date - summary.last_order) // np.timedelta64(1, 'D'),
+            'frequency': summary.order_count,
+            'monetary': summary.revenue
+        })
+
+        # Recent customers score high, so recency ranks descending.
+        rfm['r_score'] = quantile_scores(rfm['recency'], self.bins, ascending=False)
+        rfm['f_score'] = quantile_scores(rfm['frequency'], self.bins)
+        rfm['m_score'] = quantile_scores(rfm['monetary'], self.bins)
+        rfm['rfm_score'] = (rfm['r_score'].astype(np.int16) * 100 +
+                            rfm['f_score'] * 10 + rfm['m_score'])
+
+        rfm['segment'] = self.segment(rfm)
+        return rfm
@@ -0,0 +1,32 @@
+# Dashboard sections and the Chart methods each one renders. Every inner
+# list is one row of the page; rows with two charts render side by side.
+SECTIONS = {
+    "📊 Cohort Analysis": [
+        ['plot_cohort_retention_heatmap', 'plot_cohort_size_distribution'],
+        ['plot_average_retention_curve'],
+    ],
+    "💰 Revenue Analysis": [
+        ['plot_revenue_trend'],
+        ['plot_revenue_by_category', 'plot_revenue_by_payment'],
+        ['plot_top_products'],
+    ],
+    "👥 Customer Behavior": [
+        ['plot_rfm_segmentation'],
+        ['plot_purchase_frequency', 'plot_clv_distribution'],
+        ['plot_time_between_purchases'],
+    ],
+    "🌍 Regional & Demographics": [
+        ['plot_revenue_by_region', 'plot_age_distribution'],
+        ['plot_regional_performance_matrix'],
+        ['plot_category_by_region'],
+    ],
+    "📦 Order Status & Operations": [
+        ['plot_order_status_funnel', 'plot_order_status_trend'],
+        ['plot_cancellation_analysis'],
+        ['plot_order_heatmap'],
+    ],
+}
+
+
+def section_charts(section: str) -> list:
+    return [name for row in SECTIONS[section] for name in row]
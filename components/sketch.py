@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from .cohort import month_ordinals
+from .cube import MonthIndex
+
+
+SKETCH_DIMENSIONS = ['Region', 'category', 'status']
+SKETCH_COLUMNS = ['cust_id', 'order_id']
+DEFAULT_PRECISION = 9
+
+
+def relative_error(precision: int) -> float:
+    # Standard error of a HyperLogLog estimate with 2**precision registers.
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        values[high] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def register_updates(values, precision: int):
+    """Register index and rank (leading zeros + 1) for each hashed value."""
+    hashed = pd.util.hash_array(np.asarray(values))
+    index = (hashed >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashed & ((np.uint64(1) << np.uint64(64 - precision)) - np.uint64(1))
+    rank = (64 - precision + 1) - _bit_length(rest)
+    return index, rank.astype(np.uint8)
+
+
+def estimate(registers: np.ndarray) -> float:
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.sum(registers == 0, axis=-1)
+    # Linear counting is more accurate while many registers are empty.
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class SketchCube:
+    """Mergeable HyperLogLog sketches of distinct customers and orders.
+
+    One sketch per (month x Region x category x status) cell, so distinct
+    counts for any filter combination are a register-wise max over the
+    selected cells, plus the raw rows of partially covered edge months.
+    """
+
+    def __init__(self, df: pd.DataFrame, precision: int = DEFAULT_PRECISION,
+                 dimensions=SKETCH_DIMENSIONS, columns=SKETCH_COLUMNS):
+        self.precision = precision
+        self.error = relative_error(precision)
+        self.dimensions = [d for d in dimensions if d in df.columns]
+        self.columns = [c for c in columns if c in df.columns]
+
+        month = month_ordinals(df['order_date'].to_numpy())
+        self.month_index = MonthIndex(month)
+
+        # Mixed-radix integer key over the month and dimension codes.
+        first_month = int(month.min()) if len(month) else 0
+        key = (month - first_month).astype(np.int64)
+        dimension_values = []
+        for dimension in self.dimensions:
+            values = df[dimension]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            radix = len(values.cat.categories) + 1
+            key = key * radix + (values.cat.codes.to_numpy() + 1)
+            dimension_values.append((dimension, values.cat.categories, radix))
+        cell_keys, cell_codes = np.unique(key, return_inverse=True)
+
+        columns = {}
+        for dimension, categories, radix in reversed(dimension_values):
+            codes = cell_keys % radix - 1
+            columns[dimension] = pd.Categorical.from_codes(codes, categories)
+            cell_keys = cell_keys // radix
+        self.cells = pd.DataFrame({'month': cell_keys + first_month,
+                                   **dict(reversed(columns.items()))})
+        m = 2 ** precision
+
+        self.registers = {}
+        for column in self.columns:
+            index, rank = register_updates(df[column].to_numpy(), precision)
+            registers = np.zeros(len(self.cells) * m, dtype=np.uint8)
+            np.maximum.at(registers, cell_codes * m + index, rank)
+            self.registers[column] = registers.reshape(len(self.cells), m)
+
+    def nbytes(self) -> int:
+        return sum(registers.nbytes for registers in self.registers.values())
+
+    def supports(self, filters) -> bool:
+        return all(name == 'date_range' or name in self.dimensions
+                   for name, value in filters.items() if value)
+
+    def _cell_mask(self, filters, months) -> np.ndarray:
+        mask = self.cells['month'].isin(months).to_numpy()
+        for dimension in self.dimensions:
+            values = filters.get(dimension)
+            if values and len(values) > 0:
+                mask = mask & self.cells[dimension].isin(values).to_numpy()
+        return mask
+
+    def distinct(self, df: pd.DataFrame, column: str, filters, rows,
+                 start: int, stop: int, by: str = None):
+        """Estimated distinct ``column`` values, overall or per ``by`` value."""
+        months, lo, hi = self.month_index.covered(start, stop)
+        mask = self._cell_mask(filters, months)
+        edge = df.iloc[self.month_index.edge_rows(rows, lo, hi)]
+        # Callers may narrow a dimension beyond the row selection (e.g.
+        # completed orders only), so the edge rows are filtered as well.
+        for dimension in self.dimensions:
+            values = filters.get(dimension)
+            if values and len(values) > 0:
+                edge = edge[edge[dimension].isin(values)]
+        registers = self.registers[column]
+
+        if by is None:
+            merged = registers[mask].max(axis=0, initial=0)
+            index, rank = register_updates(edge[column].to_numpy(), self.precision)
+            np.maximum.at(merged, index, rank)
+            return float(estimate(merged))
+
+        groups = {}
+        cell_groups = self.cells[by].to_numpy()
+        edge_groups = edge[by].to_numpy()
+        for value in pd.unique(np.concatenate([cell_groups[mask], edge_groups])):
+            merged = registers[mask & (cell_groups == value)].max(axis=0, initial=0)
+            values = edge[column].to_numpy()[edge_groups == value]
+            index, rank = register_updates(values, self.precision)
+            np.maximum.at(merged, index, rank)
+            groups[value] = float(estimate(merged))
+        return pd.Series(groups, name=column, dtype=float)
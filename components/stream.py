@@ -0,0 +1,292 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .cohort import CohortMatrix, month_ordinals
+from .cube import CUBE_DIMENSIONS, MonthlyCube, aggregate_cells
+from .ingest import cache_path, derive_features, remove_stale
+from .summary import CustomerSummary
+
+
+STREAM_CHUNKSIZE = 250_000
+# CSVs above this size are streamed into aggregates instead of loaded as rows.
+STREAM_MIN_BYTES = 2 * 2 ** 30
+STREAM_SUFFIX = '.aggregates.pkl'
+
+# Distinct counts per group the dashboard needs, as (column, group by).
+DISTINCT_PAIRS = [('cust_id', 'Region'), ('order_id', 'Region'),
+                  ('order_id', 'status'), ('cust_id', 'cohort_month')]
+# Additive revenue / quantity / row totals beyond the monthly cube.
+GROUP_TABLES = [('sku', 'category'), ('day_of_week', 'hour')]
+ATTRIBUTE_COLUMNS = ['age', 'Gender']
+
+
+def should_stream(csv_file: str) -> bool:
+    return os.path.getsize(csv_file) >= STREAM_MIN_BYTES
+
+
+def aggregate_groups(df: pd.DataFrame, keys) -> pd.DataFrame:
+    return df.groupby(list(keys), observed=True).agg(
+        revenue=('revenue', 'sum'),
+        qty_ordered=('qty_ordered', 'sum'),
+        rows=('revenue', 'size')
+    ).reset_index()
+
+
+class FoldedTable:
+    """Additive per-key totals, folded from per-chunk tables in batches.
+
+    Chunk tables wait in a buffer until it holds as many rows as the folded
+    state, and only then are they regrouped together with it, so folding
+    costs amortized linear time in the chunk rows instead of regrouping
+    the whole state for every chunk.
+    """
+
+    def __init__(self, keys, sort: bool = False):
+        self.keys = list(keys)
+        self.sort = sort
+        self.table = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, chunk_table: pd.DataFrame):
+        self.pending.append(chunk_table)
+        self.pending_rows += len(chunk_table)
+        if self.table is None or self.pending_rows >= len(self.table):
+            self.fold()
+
+    def fold(self) -> pd.DataFrame:
+        """The folded totals, with everything buffered merged in."""
+        if self.pending:
+            frames = ([] if self.table is None else [self.table]) + self.pending
+            self.table = frames[0] if len(frames) == 1 else pd.concat(
+                frames, ignore_index=True).groupby(
+                    self.keys, observed=True, sort=self.sort).sum().reset_index()
+            self.pending = []
+            self.pending_rows = 0
+        return self.table
+
+
+def _pair_keys(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return (left.astype(np.int64) << 32) | right.astype(np.int64)
+
+
+def _union(known: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # ``known`` is sorted and unique; a stable sort merges the two sorted
+    # runs in linear time, far cheaper than np.union1d on large states.
+    merged = np.concatenate([known, np.unique(values)])
+    merged.sort(kind='stable')
+    return merged[np.r_[True, merged[1:] != merged[:-1]]]
+
+
+def _grow(values: np.ndarray, size: int, fill) -> np.ndarray:
+    if len(values) >= size:
+        return values
+    return np.concatenate([values, np.full(size - len(values), fill,
+                                           dtype=values.dtype)])
+
+
+class Encoder:
+    """Stable integer codes for the values seen across chunks."""
+
+    def __init__(self):
+        self.index = None
+
+    def __len__(self):
+        return 0 if self.index is None else len(self.index)
+
+    def encode(self, values) -> np.ndarray:
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(values.cat.categories.dtype)
+        # Extension arrays (e.g. periods) stay unboxed.
+        values = values.array
+        if self.index is None:
+            self.index = pd.Index(pd.unique(values))
+        codes = self.index.get_indexer(values)
+        new = codes < 0
+        if new.any():
+            self.index = self.index.append(pd.Index(pd.unique(values[new])))
+            codes[new] = self.index.get_indexer(values[new])
+        return codes
+
+
+class StreamingAggregator:
+    """Folds feature chunks into the aggregates the dashboard reads.
+
+    State grows with the number of customers, orders and cube cells, not
+    with rows, so a CSV larger than memory can be reduced chunk by chunk.
+    Chunks must arrive in file order for ties to resolve as in the row
+    table (the first row of a customer is its earliest, then first seen).
+    """
+
+    def __init__(self):
+        self.customers = Encoder()
+        self.orders = Encoder()
+        self.groups = {by: Encoder() for _, by in DISTINCT_PAIRS}
+        self.n_rows = 0
+        self.date_dtype = np.dtype('datetime64[ns]')
+
+        self.revenue = np.zeros(0)
+        self.row_count = np.zeros(0, dtype=np.int64)
+        self.first = np.zeros(0, dtype=np.int64)
+        self.last = np.zeros(0, dtype=np.int64)
+        self.attributes = {}
+
+        self.order_pairs = np.zeros(0, dtype=np.int64)
+        self.completed = np.zeros(0, dtype=np.int64)
+        self.distinct = {pair: np.zeros(0, dtype=np.int64) for pair in DISTINCT_PAIRS}
+
+        self.cells = None
+        self.activity = FoldedTable(['customer', 'month'])
+        self.tables = {keys: FoldedTable(keys, sort=True) for keys in GROUP_TABLES}
+
+    def add(self, chunk: pd.DataFrame):
+        chunk = derive_features(chunk)
+        if len(chunk) == 0:
+            return
+        self.n_rows += len(chunk)
+        self.date_dtype = chunk['order_date'].dtype
+
+        codes = self.customers.encode(chunk['cust_id'])
+        order_codes = self.orders.encode(chunk['order_id'])
+        n_customers = len(self.customers)
+        self._add_customers(chunk, codes, n_customers)
+
+        self.order_pairs = _union(self.order_pairs, _pair_keys(codes, order_codes))
+        completed = (chunk['status'] == 'complete').to_numpy()
+        self.completed = _union(self.completed, order_codes[completed])
+
+        for column, by in DISTINCT_PAIRS:
+            valid = chunk[by].notna().to_numpy()
+            left = codes if column == 'cust_id' else order_codes
+            right = self.groups[by].encode(chunk[by][valid])
+            self.distinct[(column, by)] = _union(
+                self.distinct[(column, by)], _pair_keys(left[valid], right))
+
+        month = month_ordinals(chunk['order_date'].to_numpy())
+        dimensions = [d for d in CUBE_DIMENSIONS if d in chunk.columns]
+        if self.cells is None:
+            self.cells = FoldedTable(['month'] + dimensions)
+        self.cells.add(aggregate_cells(chunk, dimensions, month))
+        activity = pd.DataFrame({'customer': codes, 'month': month,
+                                 'revenue': chunk['revenue'].to_numpy()})
+        self.activity.add(activity.groupby(
+            ['customer', 'month'], sort=False)['revenue'].sum().reset_index())
+        for keys in GROUP_TABLES:
+            self.tables[keys].add(aggregate_groups(chunk, keys))
+
+    def _add_customers(self, chunk, codes, n_customers):
+        self.revenue = _grow(self.revenue, n_customers, 0.0)
+        self.row_count = _grow(self.row_count, n_customers, 0)
+        self.first = _grow(self.first, n_customers, np.iinfo(np.int64).max)
+        self.last = _grow(self.last, n_customers, np.iinfo(np.int64).min)
+
+        self.revenue += np.bincount(codes, weights=chunk['revenue'].to_numpy(),
+                                    minlength=n_customers)
+        self.row_count += np.bincount(codes, minlength=n_customers)
+
+        ticks = chunk['order_date'].to_numpy().view(np.int64)
+        first = np.full(n_customers, np.iinfo(np.int64).max)
+        np.minimum.at(first, codes, ticks)
+        np.maximum.at(self.last, codes, ticks)
+
+        # Derived chunks are date-sorted, so a customer's first row in the
+        # chunk is its earliest; it replaces the stored one only if earlier.
+        first_row = np.full(n_customers, len(chunk), dtype=np.int64)
+        np.minimum.at(first_row, codes, np.arange(len(chunk)))
+        earlier = np.flatnonzero(first < self.first)
+        self.first = np.minimum(self.first, first)
+        for column in ATTRIBUTE_COLUMNS:
+            if column not in chunk.columns:
+                continue
+            values = self.attributes.setdefault(column, np.empty(0, dtype=object))
+            values = self.attributes[column] = _grow(values, n_customers, None)
+            values[earlier] = np.asarray(chunk[column].to_numpy(dtype=object))[
+                first_row[earlier]]
+
+    def finalize(self) -> dict:
+        # Customers in sorted cust_id order, as CustomerSummary has them.
+        cust_id = self.customers.index.to_numpy()
+        order = np.argsort(cust_id, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        date_dtype = self.date_dtype
+        pair_customers = rank[self.order_pairs >> 32]
+        summary = CustomerSummary.from_parts(
+            cust_id=cust_id[order],
+            revenue=self.revenue[order],
+            row_count=self.row_count[order],
+            first_order=self.first[order].view(date_dtype),
+            last_order=self.last[order].view(date_dtype),
+            order_count=np.bincount(pair_customers, minlength=len(order)),
+            n_orders=len(self.orders),
+            n_completed_orders=len(self.completed),
+            attributes={
+                column: pd.array(values[order],
+                                 dtype='category' if column == 'Gender' else None)
+                for column, values in self.attributes.items()
+            })
+
+        activity = self.activity.fold()
+        cohort_matrix = CohortMatrix.from_activity(
+            summary, rank[activity['customer'].to_numpy()],
+            activity['month'].to_numpy(), activity['revenue'].to_numpy())
+
+        cells = self.cells.fold().copy()
+        for dimension in CUBE_DIMENSIONS:
+            if dimension in cells.columns:
+                cells[dimension] = cells[dimension].astype('category')
+
+        distinct = {}
+        for (column, by), keys in self.distinct.items():
+            counts = np.bincount(keys & 0xFFFFFFFF, minlength=len(self.groups[by]))
+            distinct[(column, by)] = pd.Series(
+                counts, index=pd.Index(self.groups[by].index, name=by),
+                name=column).sort_index()
+
+        return {
+            'n_rows': self.n_rows,
+            'cube': MonthlyCube.from_cells(cells),
+            'summary': summary,
+            'cohort_matrix': cohort_matrix,
+            'distinct': distinct,
+            'tables': {keys: table.fold() for keys, table in self.tables.items()},
+        }
+
+
+def stream_csv(csv_file: str, chunksize: int = STREAM_CHUNKSIZE) -> StreamingAggregator:
+    aggregator = StreamingAggregator()
+    for chunk in pd.read_csv(csv_file, chunksize=chunksize, low_memory=False):
+        aggregator.add(chunk)
+    return aggregator
+
+
+def store_state(aggregator: StreamingAggregator, csv_file: str, cache_dir: str = None):
+    # The aggregator itself is persisted, so appended batches can be
+    # folded in later without streaming the whole file again.
+    path = cache_path(csv_file, cache_dir, suffix=STREAM_SUFFIX)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(aggregator, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        remove_stale(path, suffix=STREAM_SUFFIX)
+    except OSError:
+        pass
+
+
+def ingest_streaming(csv_file: str, cache_dir: str = None,
+                     chunksize: int = STREAM_CHUNKSIZE) -> StreamingAggregator:
+    path = cache_path(csv_file, cache_dir, suffix=STREAM_SUFFIX)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    aggregator = stream_csv(csv_file, chunksize)
+    store_state(aggregator, csv_file, cache_dir)
+    return aggregator
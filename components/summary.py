@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+class CustomerSummary:
+    """Per-customer aggregates of a row selection, computed in one pass.
+
+    Customers are factorized to dense integer codes once and every
+    aggregate is a NumPy reduction over those codes, so the result is a
+    set of aligned arrays (one slot per customer) instead of a frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.row_codes, cust_id = pd.factorize(df['cust_id'], sort=True)
+        self.cust_id = np.asarray(cust_id)
+        n_customers = len(self.cust_id)
+        n_rows = len(df)
+        codes = self.row_codes
+
+        self.revenue = np.bincount(codes, weights=df['revenue'].to_numpy(),
+                                   minlength=n_customers)
+        self.row_count = np.bincount(codes, minlength=n_customers)
+
+        dates = df['order_date'].to_numpy()
+        ticks = dates.view(np.int64)
+        first = np.full(n_customers, np.iinfo(np.int64).max)
+        last = np.full(n_customers, np.iinfo(np.int64).min)
+        np.minimum.at(first, codes, ticks)
+        np.maximum.at(last, codes, ticks)
+        self.first_order = first.view(dates.dtype)
+        self.last_order = last.view(dates.dtype)
+
+        # Distinct orders: unique (customer, order) pairs on integer codes.
+        order_codes, order_uniques = pd.factorize(df['order_id'])
+        self.n_orders = len(order_uniques)
+        pairs = np.unique(codes.astype(np.int64) * max(self.n_orders, 1) +
+                          order_codes)
+        self.order_count = np.bincount(pairs // max(self.n_orders, 1),
+                                       minlength=n_customers)
+        completed = (df['status'] == 'complete').to_numpy()
+        self.n_completed_orders = len(np.unique(order_codes[completed]))
+
+        # "first" row of each customer, for per-customer attributes.
+        first_row = np.full(n_customers, n_rows, dtype=np.int64)
+        np.minimum.at(first_row, codes, np.arange(n_rows))
+        self.attributes = {
+            column: df[column].array.take(first_row)
+            for column in ['age', 'Gender'] if column in df.columns
+        }
+
+    @classmethod
+    def from_parts(cls, cust_id, revenue, row_count, first_order, last_order,
+                   order_count, n_orders, n_completed_orders, attributes):
+        # For aggregates folded elsewhere (e.g. a streamed ingest), where
+        # there are no rows to map back to customers.
+        summary = cls.__new__(cls)
+        summary.row_codes = None
+        summary.cust_id = cust_id
+        summary.revenue = revenue
+        summary.row_count = row_count
+        summary.first_order = first_order
+        summary.last_order = last_order
+        summary.order_count = order_count
+        summary.n_orders = n_orders
+        summary.n_completed_orders = n_completed_orders
+        summary.attributes = attributes
+        return summary
+
+    def __len__(self):
+        return len(self.cust_id)
+
+    @property
+    def age(self):
+        return self.attributes['age']
+
+    @property
+    def gender(self):
+        return self.attributes['Gender']
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'cust_id': self.cust_id,
+            'order_count': self.order_count,
+            'revenue': self.revenue,
+            'first_order': self.first_order,
+            'last_order': self.last_order,
+            **self.attributes
+        })
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .forecast import CONFIDENCE, FORECAST_HORIZON, RetentionForecast
+from .ingest import CACHE_DIR_NAME
+from .payloadcache import PayloadCache
+
+
+# Per-cohort time-series models, as statsmodels keyword arguments.
+MODEL_SPECS = {
+    'ets': {'error': 'add', 'trend': 'add', 'damped_trend': True},
+    'arima': {'order': (1, 1, 0)},
+}
+# Shorter repeat-month histories take the batched log-linear forecast.
+MIN_SERIES = 8
+MODEL_WORKERS = min(16, os.cpu_count() or 1)
+# Fitted parameters and forecasts per series, a few hundred bytes each.
+MODEL_CACHE_BYTES = 16 * 2 ** 20
+MODEL_DISK_BYTES = 256 * 2 ** 20
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def model_cache_dir(csv_file: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(csv_file)),
+                        CACHE_DIR_NAME, 'forecasts')
+
+
+def _model(name: str, values: np.ndarray):
+    # statsmodels takes seconds to import; only model runs pay for it.
+    if name == 'ets':
+        from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+        return ETSModel(pd.Series(values), **MODEL_SPECS[name])
+    from statsmodels.tsa.arima.model import ARIMA
+    return ARIMA(pd.Series(values), **MODEL_SPECS[name])
+
+
+def fit_series(name: str, values: np.ndarray, params, horizon: int,
+               confidence: float) -> dict:
+    """Fit (or, given ``params``, only re-filter) one series and forecast it."""
+    with warnings.catch_warnings():
+        # Short, flat retention series routinely trip convergence warnings.
+        warnings.simplefilter('ignore')
+        model = _model(name, values)
+        if params is None:
+            results = model.fit(disp=False) if name == 'ets' else model.fit()
+        elif name == 'ets':
+            results = model.smooth(np.asarray(params))
+        else:
+            results = model.filter(np.asarray(params))
+        start = len(values)
+        if name == 'ets':
+            frame = results.get_prediction(start=start, end=start + horizon - 1) \
+                .summary_frame(alpha=1 - confidence)
+        else:
+            frame = results.get_forecast(horizon).summary_frame(alpha=1 - confidence)
+    mean, lower, upper = (frame.iloc[:, i].to_numpy() for i in (0, -2, -1))
+    return {
+        'params': np.asarray(results.params, dtype=float).tolist(),
+        'horizon': horizon,
+        'confidence': confidence,
+        'mean': mean.tolist(),
+        'lower': lower.tolist(),
+        'upper': upper.tolist(),
+    }
+
+
+def _fit_task(task) -> dict:
+    return fit_series(*task)
+
+
+def _pool(max_workers: int) -> ProcessPoolExecutor:
+    with _lock:
+        if max_workers not in _pools:
+            _pools[max_workers] = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pools[max_workers]
+
+
+class CohortModelRunner:
+    """Per-cohort ARIMA/ETS forecasts, fitted in parallel and cached.
+
+    Each cohort's repeat-month retention series is fitted on its own.
+    Fitted parameters are kept on disk keyed by a hash of the model spec
+    and the series, so a rerun refits only cohorts whose history changed;
+    the rest are re-filtered with their stored parameters, or served
+    as-is when horizon and confidence also match.
+    """
+
+    def __init__(self, model: str = 'ets', horizon: int = FORECAST_HORIZON,
+                 confidence: float = CONFIDENCE, cache_dir: str = None,
+                 max_workers: int = MODEL_WORKERS):
+        if model not in MODEL_SPECS:
+            raise ValueError(f"Unknown model {model!r}; expected one of {list(MODEL_SPECS)}")
+        self.model = model
+        self.horizon = horizon
+        self.confidence = confidence
+        self.max_workers = max_workers
+        self.cache = PayloadCache(MODEL_CACHE_BYTES, directory=cache_dir,
+                                  max_disk_bytes=MODEL_DISK_BYTES)
+        self.fitted = 0
+        self.reused = 0
+
+    def series_key(self, values: np.ndarray) -> tuple:
+        digest = hashlib.sha1(np.ascontiguousarray(values, dtype=float).tobytes())
+        return (self.model, repr(MODEL_SPECS[self.model]), digest.hexdigest())
+
+    def _run_tasks(self, tasks: list) -> list:
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            return [_fit_task(task) for task in tasks]
+        chunksize = max(1, len(tasks) // (4 * self.max_workers))
+        return list(_pool(self.max_workers).map(_fit_task, tasks, chunksize=chunksize))
+
+    def run(self, cohort_data: pd.DataFrame) -> pd.DataFrame:
+        """Forecast rows in the ``RetentionForecast.predictions`` layout.
+
+        A ``model`` column names the model each cohort's rows come from.
+        """
+        baseline = RetentionForecast(cohort_data, self.horizon, self.confidence)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            retention = baseline.active / baseline.size[:, None] * 100
+
+        results, keys, refit, refilter = {}, {}, [], []
+        for row in np.flatnonzero(baseline.present & (baseline.last_age >= MIN_SERIES)):
+            values = retention[row, 1:baseline.last_age[row] + 1]
+            keys[row] = key = self.series_key(values)
+            payload = self.cache.get(key)
+            stored = json.loads(payload) if payload is not None else None
+            if stored is None:
+                refit.append(row)
+            elif (stored['horizon'], stored['confidence']) == (self.horizon, self.confidence):
+                results[row] = stored
+            else:
+                refilter.append((row, stored['params']))
+
+        tasks = [(self.model, retention[row, 1:baseline.last_age[row] + 1], None,
+                  self.horizon, self.confidence) for row in refit]
+        # Re-filtering with known parameters takes milliseconds, it stays here.
+        for row, params in refilter:
+            results[row] = fit_series(self.model, retention[row, 1:baseline.last_age[row] + 1],
+                                      params, self.horizon, self.confidence)
+        for row, result in zip(refit, self._run_tasks(tasks)):
+            results[row] = result
+        for row in refit + [row for row, _ in refilter]:
+            self.cache.put(keys[row], json.dumps(results[row]))
+        self.fitted += len(refit)
+        self.reused += len(keys) - len(refit)
+
+        frame = baseline.predictions()
+        frame['model'] = 'log-linear'
+        if not results:
+            return frame
+        rows = np.array(sorted(results))
+        ages = baseline.last_age[rows, None] + 1 + np.arange(self.horizon)[None, :]
+
+        def stacked(name):
+            return np.clip(np.array([results[row][name] for row in rows]), 0, 100)
+
+        estimate = stacked('mean')
+        modelled = pd.DataFrame({
+            'cohort_month': pd.PeriodIndex.from_ordinals(
+                np.repeat(baseline.first_cohort + rows, self.horizon), freq='M'),
+            'cohort_age': ages.ravel(),
+            'predicted_retention': estimate.ravel(),
+            'lower_bound': stacked('lower').ravel(),
+            'upper_bound': stacked('upper').ravel(),
+            'predicted_active_customers': (estimate / 100 *
+                                           baseline.size[rows, None]).ravel(),
+            'model': self.model,
+        })
+        replaced = frame['cohort_month'].isin(modelled['cohort_month'].unique())
+        return pd.concat([frame[~replaced], modelled], ignore_index=True).sort_values(
+            ['cohort_month', 'cohort_age'], ignore_index=True)
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date
+
+import pandas as pd
+
+from components.core import Data
+from components.forecast import EXPORT_FILES
+from components.tsforecast import MODEL_SPECS
+
+
+FILTER_NAMES = {'region': 'Region', 'category': 'category', 'status': 'status'}
+FORMATS = ('csv', 'parquet')
+
+
+def add_filter(filters: dict, name: str, key: str, values):
+    """Validate one filter of set ``name`` and add it to ``filters``.
+
+    ``None`` values leave the filter unset.
+    """
+    key = key.strip().lower()
+    if key not in FILTER_NAMES and key not in ('date', 'date_range'):
+        raise ValueError(f"Unknown filter {key!r} in set {name!r}")
+    if values is None:
+        return
+    if key in FILTER_NAMES:
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"{key} in set {name!r} must be a list of strings, "
+                             f"got {values!r}")
+        filters[FILTER_NAMES[key]] = [value for value in values if value]
+        return
+    if (not isinstance(values, (list, tuple)) or len(values) != 2
+            or not all(value is None or isinstance(value, str) for value in values)):
+        raise ValueError(f"date range in set {name!r} must be [START, END], got {values!r}")
+    try:
+        filters['date_range'] = tuple(date.fromisoformat(value) if value else None
+                                      for value in values)
+    except ValueError as exc:
+        raise ValueError(f"date range in set {name!r}: {exc}") from None
+
+
+def parse_filter_set(tokens: list) -> tuple:
+    """``NAME [key=v1,v2 ...]`` -> (name, filters) for ``Data.set_filters``.
+
+    Keys are ``region``, ``category``, ``status`` and ``date``, the last
+    as ``START:END`` (ISO dates, either side may be left empty).
+    """
+    name, filters = tokens[0], {}
+    for token in tokens[1:]:
+        key, _, values = token.partition('=')
+        if key.strip().lower() == 'date':
+            start, _, end = values.partition(':')
+            add_filter(filters, name, key, [start, end])
+        else:
+            add_filter(filters, name, key, values.split(','))
+    return name, filters
+
+
+def load_filter_sets(path: str) -> list:
+    """Filter sets from a JSON file, checked like ``--set`` arguments.
+
+    ``{"name": {"region": [...], "date_range": ["2021-01-01", null]}}``;
+    ``date`` and the ``set_filters`` names (``Region``) are accepted too.
+    """
+    with open(path) as f:
+        sets = json.load(f)
+    if not isinstance(sets, dict):
+        raise ValueError(f"{path}: expected a JSON object of filter sets by name")
+    result = []
+    for name, entries in sets.items():
+        if not isinstance(entries, dict):
+            raise ValueError(f"Set {name!r} in {path} must be an object of filters")
+        filters = {}
+        for key, values in entries.items():
+            add_filter(filters, name, key, values)
+        result.append((name, filters))
+    return result
+
+
+def resolve_date_range(data: Data, date_range):
+    # Open ends take the dataset's first / last order date.
+    if not date_range:
+        return None
+    start, end = date_range
+    dates = data.df['order_date']
+    return (start or dates.iloc[0].date(), end or dates.iloc[-1].date())
+
+
+def _portable(frame: pd.DataFrame) -> pd.DataFrame:
+    # Periods as 'YYYY-MM' and string column labels, readable by any tool.
+    frame = frame.copy()
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.PeriodDtype):
+            frame[column] = frame[column].astype(str)
+    if isinstance(frame.index, pd.PeriodIndex):
+        frame.index = frame.index.astype(str)
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def write_table(frame: pd.DataFrame, directory: str, name: str, fmt: str,
+                index: bool = False) -> str:
+    path = os.path.join(directory, f"{name}.{fmt}")
+    frame = _portable(frame)
+    if fmt == 'parquet':
+        frame.to_parquet(path, index=index)
+    else:
+        frame.to_csv(path, index=index)
+    return path
+
+
+def export_tables(data: Data, directory: str, fmt: str, models: bool = False) -> list:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    kpis = pd.DataFrame([data.compute_kpis()])
+    paths.append(write_table(kpis, directory, 'kpis', fmt))
+
+    matrix = data.calculate_cohort_matrix()
+    paths.append(write_table(matrix.retention(), directory, 'cohort_retention', fmt,
+                             index=True))
+    paths.append(write_table(data.calculate_cohort_data(), directory, 'cohort_data', fmt))
+    paths.append(write_table(data.calculate_rfm(), directory, 'rfm', fmt))
+
+    forecast = data.calculate_retention_forecast()
+    for table, file_name in EXPORT_FILES.items():
+        name = os.path.splitext(file_name)[0]
+        paths.append(write_table(getattr(forecast, table)(), directory, name, fmt))
+    if models:
+        paths.append(write_table(data.calculate_model_forecast(), directory,
+                                 'cohort_model_predictions', fmt))
+    return paths
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name) or 'set'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export KPIs, cohort tables, RFM and predictions without the dashboard.")
+    parser.add_argument('csv_file')
+    parser.add_argument('--out', default='exports',
+                        help="One subdirectory per filter set is written here.")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--set', dest='sets', nargs='+', action='append', default=[],
+                        metavar='NAME [KEY=VALUES]',
+                        help="Filter set, e.g. --set south region=South,West "
+                             "status=complete date=2021-01-01:2021-06-30. Repeatable.")
+    parser.add_argument('--sets-file', help="JSON object of filter sets by name.")
+    parser.add_argument('--model', choices=list(MODEL_SPECS),
+                        help="Also write per-cohort ETS/ARIMA forecasts.")
+    parser.add_argument('--streaming', action='store_true', default=None,
+                        help="Stream the CSV into aggregates (no filters).")
+    args = parser.parse_args(argv)
+
+    try:
+        filter_sets = [parse_filter_set(tokens) for tokens in args.sets]
+        if args.sets_file:
+            filter_sets += load_filter_sets(args.sets_file)
+    except ValueError as exc:
+        parser.error(str(exc))
+    filter_sets = filter_sets or [('all', {})]
+    # Each set writes to its own directory, so names must stay distinct
+    # once sanitized (and on case-insensitive filesystems).
+    directories = {}
+    for name, _ in filter_sets:
+        directory = safe_name(name).lower()
+        if directory in directories:
+            parser.error(f"filter sets {directories[directory]!r} and {name!r} "
+                         f"would be written to the same directory; rename one")
+        directories[directory] = name
+
+    # Loaded once; every set only re-selects rows of the same table.
+    data = Data(args.csv_file, streaming=args.streaming)
+    if args.model:
+        data.model_runner.model = args.model
+    if data.streaming and any(filters for _, filters in filter_sets):
+        parser.error("filters are not available for streamed (aggregate) datasets")
+
+    for name, filters in filter_sets:
+        state = {'date_range': None, 'Region': None, 'category': None,
+                 'status': None, **filters}
+        if not data.streaming:
+            state['date_range'] = resolve_date_range(data, state['date_range'])
+        data.set_filters(**state)
+        directory = os.path.join(args.out, safe_name(name))
+        paths = export_tables(data, directory, args.format, bool(args.model))
+        print(f"{name}: {data.selected_rows():,} rows -> {len(paths)} files in {directory}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import streamlit as st
-from components import Chart
+from components import session_chart
+from components.parallel import render_figures
+from components.sections import SECTIONS, section_charts
 
 st.set_page_config(
     page_title="Customer Cohort Analysis Dashboard",
@@ -53,19 +55,19 @@ st.markdown(f"""
         margin-bottom: 30px;
     }}
     
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {{
+    /* Section selector styling */
+    .stRadio [role="radiogroup"] {{
         gap: 8px;
         margin-top: 32px;
     }}
     
-    .stTabs [data-baseweb="tab"] {{
+    .stRadio [role="radiogroup"] label {{
         padding: 10px 20px;
         background-color: transparent;
         border-radius: 5px;
     }}
     
-    .stTabs [aria-selected="true"] {{
+    .stRadio [role="radiogroup"] label:has(input:checked) {{
         background-color: var(--primary-color);
         color: white;
     }}
@@ -81,54 +83,92 @@ st.title('📊 Customer Cohort Analysis Dashboard')
 st.caption(
     'Comprehensive insights into customer behavior, revenue trends, and operational performance')
 
-c = Chart('data/cohort.csv')
+c = session_chart('data/cohort.csv')
 with st.sidebar:
     st.header("🔍 Filters")
 
-    st.subheader("Date Range")
-    min_date = c.df['order_date'].min()
-    max_date = c.df['order_date'].max()
-
-    date_range = st.date_input(
-        "Select date range",
-        value=(min_date, max_date),
-        min_value=min_date,
-        max_value=max_date,
-        key='date_range'
-    )
-
-    st.subheader("Region")
-    all_regions = c.unique_values('Region')
-    region = st.multiselect(
-        "Select regions",
-        options=all_regions,
-        default=all_regions,
-    )
-
-    st.subheader("Category")
-    all_categories = c.unique_values('category')
-    category = st.multiselect(
-        "Select categories",
-        options=all_categories,
-        default=all_categories,
+    if c.streaming:
+        st.info("This dataset is too large to load as rows, so it is served "
+                "from aggregates built while streaming the file. Filters are "
+                "unavailable and every chart covers all orders.")
+    else:
+        st.subheader("Date Range")
+        min_date = c.df['order_date'].min()
+        max_date = c.df['order_date'].max()
+
+        date_range = st.date_input(
+            "Select date range",
+            value=(min_date, max_date),
+            min_value=min_date,
+            max_value=max_date,
+            key='date_range'
+        )
+
+        st.subheader("Region")
+        all_regions = c.unique_values('Region')
+        region = st.multiselect(
+            "Select regions",
+            options=all_regions,
+            default=all_regions,
+        )
+
+        st.subheader("Category")
+        all_categories = c.unique_values('category')
+        category = st.multiselect(
+            "Select categories",
+            options=all_categories,
+            default=all_categories,
+        )
+
+        st.subheader("Order Status")
+        all_statuses = c.unique_values('status')
+        status = st.multiselect(
+            "Select order statuses",
+            options=all_statuses,
+            default=all_statuses
+        )
+
+    st.subheader("Performance")
+    if not c.streaming:
+        approximate = st.toggle(
+            "Approximate distinct counts",
+            value=False,
+            help="Estimate customer and order counts from HyperLogLog sketches "
+                 "instead of scanning every row."
+        )
+        worker_processes = st.toggle(
+            "Build charts in worker processes",
+            value=False,
+            help="Use a process pool instead of threads. Workers memory-map "
+                 "one shared copy of the dataset and keep their own filter "
+                 "indexes and tables, so the first rerun is slower."
+        )
+    show_profile = st.toggle(
+        "Show performance panel",
+        value=False,
+        help="Time every load, filter, table and chart step of this rerun."
     )
-
-    st.subheader("Order Status")
-    all_statuses = c.unique_values('status')
-    status = st.multiselect(
-        "Select order statuses",
-        options=all_statuses,
-        default=all_statuses
+    c.profiler.track_memory = show_profile and st.checkbox(
+        "Trace memory (slower)", value=False)
+
+if not c.streaming:
+    c.set_approximate(approximate)
+    c.set_filters(
+        date_range=date_range,
+        Region=region,
+        category=category,
+        status=status
     )
 
-c.set_filters(
-    date_range=date_range,
-    Region=region,
-    category=category,
-    status=status
-)
-
 kpis = c.compute_kpis()
+approx_note = f'<div class="kpi-delta">± {kpis["distinct_error"]:.1%} (approx.)</div>' \
+    if kpis['distinct_error'] else ''
+# Approximate KPIs skip the per-customer pass the repeat rate needs.
+if kpis['repeat_rate'] is None:
+    repeat_rate = '—'
+    repeat_note = '<div class="kpi-delta">exact mode only</div>'
+else:
+    repeat_rate, repeat_note = f"{kpis['repeat_rate']:.1f}%", ''
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -144,6 +184,7 @@ with col2:
     <div class="kpi-card">
         <div class="kpi-label">👥 Total Customers</div>
         <div class="kpi-value">{kpis['total_customers']:,}</div>
+        {approx_note}
     </div>
     """, unsafe_allow_html=True)
 
@@ -152,6 +193,7 @@ with col3:
     <div class="kpi-card">
         <div class="kpi-label">📦 Total Orders</div>
         <div class="kpi-value">{kpis['total_orders']:,}</div>
+        {approx_note}
     </div>
     """, unsafe_allow_html=True)
 
@@ -180,7 +222,8 @@ with col6:
     st.markdown(f"""
     <div class="kpi-card">
         <div class="kpi-label">🔄 Repeat Purchase Rate</div>
-        <div class="kpi-value">{kpis['repeat_rate']:.1f}%</div>
+        <div class="kpi-value">{repeat_rate}</div>
+        {repeat_note}
     </div>
     """, unsafe_allow_html=True)
 
@@ -201,75 +244,58 @@ with col8:
     """, unsafe_allow_html=True)
 
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Cohort Analysis",
-    "💰 Revenue Analysis",
-    "👥 Customer Behavior",
-    "🌍 Regional & Demographics",
-    "📦 Order Status & Operations",
-])
-
-with tab1:
-    st.markdown("### 📊 Cohort Analysis")
-
-    col1, col2 = st.columns(2)
-    with col1:
-
-        st.plotly_chart(c.plot_cohort_retention_heatmap(), width='stretch')
-    with col2:
-        st.plotly_chart(c.plot_cohort_size_distribution(), width='stretch')
-
-    st.plotly_chart(c.plot_average_retention_curve(), width='stretch')
-
-with tab2:
-    st.markdown("### 💰 Revenue Analysis")
-
-    st.plotly_chart(c.plot_revenue_trend(), width='stretch')
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(c.plot_revenue_by_category(), width='stretch')
-    with col2:
-        st.plotly_chart(c.plot_revenue_by_payment(), width='stretch')
-
-    st.plotly_chart(c.plot_top_products(), width='stretch')
-
-
-with tab3:
-    st.markdown("### 👥 Customer Behavior")
-
-    st.plotly_chart(c.plot_rfm_segmentation(), width='stretch')
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(c.plot_purchase_frequency(), width='stretch')
-    with col2:
-        st.plotly_chart(c.plot_clv_distribution(), width='stretch')
-
-    st.plotly_chart(c.plot_time_between_purchases(), width='stretch')
-
-with tab4:
-    st.markdown("### 🌍 Regional & Demographics")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(c.plot_revenue_by_region(), width='stretch')
-    with col2:
-        st.plotly_chart(c.plot_age_distribution(), width='stretch')
-
-    st.plotly_chart(c.plot_regional_performance_matrix(), width='stretch')
-
-    st.plotly_chart(c.plot_category_by_region(), width='stretch')
-
-with tab5:
-    st.markdown("### 📦 Order Status & Operations")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.plotly_chart(c.plot_order_status_funnel(), width='stretch')
-
-    with col2:
-        st.plotly_chart(c.plot_order_status_trend(), width='stretch')
+# Only the selected section is computed; st.tabs would build every figure
+# of every tab on each rerun.
+section = st.radio(
+    "Section",
+    options=list(SECTIONS),
+    horizontal=True,
+    label_visibility='collapsed',
+    key='section'
+)
 
-    st.plotly_chart(c.plot_cancellation_analysis(), width='stretch')
-    st.plotly_chart(c.plot_order_heatmap(), width='stretch')
+st.markdown(f"### {section}")
+
+# The section's charts are built concurrently, then laid out in order.
+figures = render_figures(c, section_charts(section),
+                         processes=not c.streaming and worker_processes)
+
+for row in SECTIONS[section]:
+    if len(row) == 1:
+        st.plotly_chart(figures[row[0]], width='stretch')
+        continue
+
+    for col, chart_name in zip(st.columns(len(row)), row):
+        with col:
+            st.plotly_chart(figures[chart_name], width='stretch')
+
+def profile_table(records):
+    st.dataframe([
+        {
+            'step': '· ' * r['depth'] + r['name'],
+            'ms': round(r['seconds'] * 1000, 1),
+            'rows in': r['rows_in'],
+            'rows out': r['rows_out'],
+            'alloc MB': round(r['alloc_mb'], 2) if 'alloc_mb' in r else None,
+        }
+        for r in records
+    ], hide_index=True)
+
+
+if show_profile:
+    records = c.profiler.last_run()
+    with st.sidebar:
+        st.caption(f"This rerun: {sum(r['seconds'] for r in records if r['depth'] == 0):.3f} s "
+                   f"in {len(records)} instrumented calls")
+        profile_table(records)
+        # Loaded once per source version and shared by every session.
+        load = c.dataset.load_records
+        if load:
+            st.caption(f"Dataset load: {load[0]['seconds']:.3f} s, shared by all sessions")
+            profile_table(load)
+        st.download_button(
+            "Export JSON lines",
+            data=c.profiler.jsonl(),
+            file_name="profile.jsonl",
+            mime="application/x-ndjson"
+        )